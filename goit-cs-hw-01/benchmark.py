@@ -0,0 +1,278 @@
+# Run command to benchmark every pipeline stage: python benchmark.py --size 1000 --depth 50
+# Save and compare runs: python benchmark.py --output new.json --compare old.json
+# Tree-walk, iterative and VM evaluation side by side: python benchmark.py --evaluator all
+
+
+import argparse
+import cProfile
+import json
+import platform
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from interpreter import (
+    EOF_TOKEN, LEXER_BACKENDS, Compiler, Interpreter, IterativeInterpreter,
+    IterativeParser, Parser, TokenStream, VirtualMachine
+)
+from optimizer import count_tree_nodes
+
+PARSERS = {"recursive": Parser, "iterative": IterativeParser}
+EVALUATORS = ("tree", "iterative", "vm")
+EVALUATOR_CHOICES = EVALUATORS + ("all",)
+
+
+def parse_operator_mix(spec: str) -> dict[str, float]:
+    """Parses an operator mix such as '+:2,-:1,*:1,/:1' into weights."""
+    weights = {}
+    for item in spec.split(","):
+        op, _, weight = item.partition(":")
+        if op not in ("+", "-", "*", "/"):
+            raise ValueError(f"Unknown operator in mix: {op!r}")
+        weights[op] = float(weight or 1)
+    return weights
+
+
+def generate_expression(num_operands: int, depth: int = 0, operator_mix: dict[str, float] | None = None,
+                        seed: int = 0) -> str:
+    """Builds a random expression with the given operand count and parenthesis depth.
+
+    The first `depth` operators each wrap everything before them in parentheses,
+    e.g. depth 2 gives '((a + b) * c) - d ...'. Every divisor is a literal between
+    1 and 99, so generated expressions never divide by zero.
+
+    Args:
+        num_operands (int): Total number of integer literals.
+        depth (int): Parenthesis nesting depth, at most num_operands - 1.
+        operator_mix (dict[str, float]): Relative weights of '+', '-', '*', '/'.
+        seed (int): Random seed, the same arguments always give the same text.
+
+    Returns:
+        str: The generated expression.
+    """
+    rng = random.Random(seed)
+    operator_mix = operator_mix or {"+": 1, "-": 1, "*": 1, "/": 1}
+    operators = list(operator_mix)
+    weights = list(operator_mix.values())
+    depth = max(0, min(depth, num_operands - 1))
+
+    parts = ["(" * depth, str(rng.randint(1, 99))]
+    for i in range(num_operands - 1):
+        parts.append(f" {rng.choices(operators, weights)[0]} {rng.randint(1, 99)}")
+        if i < depth:
+            parts.append(")")
+    return "".join(parts)
+
+
+def lex_all(lexer_class, text: str) -> list:
+    """Drains a lexer into a list of tokens (EOF excluded)."""
+    lexer = lexer_class(text)
+    tokens = []
+    token = lexer.get_next_token()
+    while token is not EOF_TOKEN:
+        tokens.append(token)
+        token = lexer.get_next_token()
+    return tokens
+
+
+def build_stages(text: str, lexer: str, parser: str, evaluator: str) -> tuple[dict, int]:
+    """Prepares one zero-argument callable per pipeline stage.
+
+    Every stage is fed with the precomputed output of the previous one,
+    so each callable times a single stage only. With evaluator "all" every
+    evaluator gets its own stage, named evaluate[<evaluator>].
+
+    Returns:
+        tuple[dict, int]: Stage name to callable, and the number of tokens in `text`.
+    """
+    lexer_class = LEXER_BACKENDS[lexer]
+    parser_class = PARSERS[parser]
+    tokens = lex_all(lexer_class, text)
+    tree = parser_class(TokenStream(tokens)).expr()
+
+    stages = {
+        "lex": lambda: lex_all(lexer_class, text),
+        "parse": lambda: parser_class(TokenStream(tokens)).expr(),
+    }
+    for name in (EVALUATORS if evaluator == "all" else (evaluator,)):
+        stage = "evaluate" if evaluator != "all" else f"evaluate[{name}]"
+        if name == "vm":
+            program = Compiler().compile(tree)
+            vm = VirtualMachine()
+            stages["compile"] = lambda: Compiler().compile(tree)
+            stages[stage] = lambda: vm.run(program)
+        else:
+            interpreter_class = Interpreter if name == "tree" else IterativeInterpreter
+            interpreter = interpreter_class(parser=None)
+            stages[stage] = lambda interpreter=interpreter: interpreter.visit(tree)
+    return stages, len(tokens)
+
+
+def time_stage(func, min_time: float) -> tuple[int, float]:
+    """Runs `func` repeatedly for at least `min_time` seconds and returns (runs, elapsed)."""
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or runs == 0:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return runs, elapsed
+
+
+def peak_memory(func) -> int:
+    """Returns peak traced memory in bytes allocated during one call of `func`."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def memory_per_node(parse) -> tuple[float, int]:
+    """Traced memory held by the tree `parse` returns, per AST node, and the node count."""
+    tracemalloc.start()
+    try:
+        tree = parse()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    nodes = count_tree_nodes(tree)
+    return retained / nodes, nodes
+
+
+def profile_stage(func, path: str, top: int) -> None:
+    """Dumps cProfile stats for one call of `func` to `path` and prints the top entries."""
+    profiler = cProfile.Profile()
+    profiler.runcall(func)
+    profiler.dump_stats(path)
+    print(f"\nProfile written to {path}")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+
+
+def run_benchmark(args) -> dict:
+    """Times every stage for the configuration in `args` and returns a JSON-serializable report."""
+    operator_mix = parse_operator_mix(args.ops)
+    text = generate_expression(args.size, args.depth, operator_mix, args.seed)
+    stages, num_tokens = build_stages(text, args.lexer, args.parser, args.evaluator)
+
+    results = {}
+    for name, func in stages.items():
+        runs, elapsed = time_stage(func, args.min_time)
+        results[name] = {
+            "runs": runs,
+            "seconds_per_op": elapsed / runs,
+            "ops_per_sec": runs / elapsed,
+            "tokens_per_sec": num_tokens * runs / elapsed,
+            "peak_memory_bytes": peak_memory(func),
+        }
+        if name == "parse":
+            results[name]["bytes_per_node"], results[name]["nodes"] = memory_per_node(func)
+        if args.profile:
+            profile_stage(func, f"{args.profile}_{name}.prof", args.profile_top)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            "size": args.size,
+            "depth": args.depth,
+            "ops": args.ops,
+            "seed": args.seed,
+            "lexer": args.lexer,
+            "parser": args.parser,
+            "evaluator": args.evaluator,
+            "tokens": num_tokens,
+        },
+        "results": results,
+    }
+
+
+def print_report(report: dict) -> None:
+    config = report["config"]
+    print(f"\n{config['tokens']} tokens, depth {config['depth']}, ops {config['ops']}, "
+          f"lexer={config['lexer']} parser={config['parser']} evaluator={config['evaluator']}")
+    print(f"{'stage':<20}{'ops/sec':>14}{'tokens/sec':>16}{'time/op':>14}{'peak memory':>16}")
+    for name, result in report["results"].items():
+        print(f"{name:<20}{result['ops_per_sec']:>14,.1f}{result['tokens_per_sec']:>16,.0f}"
+              f"{result['seconds_per_op'] * 1e3:>11.3f} ms{result['peak_memory_bytes'] / 1024:>12,.1f} KiB")
+    parse = report["results"].get("parse")
+    if parse and "bytes_per_node" in parse:
+        print(f"\nAST: {parse['bytes_per_node']:.1f} bytes per node ({parse['nodes']} nodes)")
+    tree = report["results"].get("evaluate[tree]")
+    if tree:
+        for name in ("iterative", "vm"):
+            other = report["results"][f"evaluate[{name}]"]
+            print(f"{name} evaluation vs tree-walk: speedup x{tree['seconds_per_op'] / other['seconds_per_op']:.2f}")
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float) -> bool:
+    """Prints per-stage changes against a baseline report.
+
+    Returns:
+        bool: True if any stage lost more than `threshold` percent of its throughput.
+    """
+    if baseline["config"] != current["config"]:
+        print("\nWarning: baseline was recorded with a different configuration")
+    regressed = False
+    print(f"\nCompared to baseline from {baseline['timestamp']}:")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<20} no baseline")
+            continue
+        change = (result["ops_per_sec"] / old["ops_per_sec"] - 1) * 100
+        memory_change = (result["peak_memory_bytes"] / max(old["peak_memory_bytes"], 1) - 1) * 100
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{name:<20} throughput {change:+7.1f}%   peak memory {memory_change:+7.1f}%{flag}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the lexer, parser and evaluator separately")
+    parser.add_argument("--size", type=int, default=1000, help="Number of operands in the expression")
+    parser.add_argument("--depth", type=int, default=0, help="Parenthesis nesting depth")
+    parser.add_argument("--ops", default="+:1,-:1,*:1,/:1", help="Operator mix as op:weight pairs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lexer", choices=sorted(LEXER_BACKENDS), default="regex")
+    parser.add_argument("--parser", choices=sorted(PARSERS), default="iterative")
+    parser.add_argument("--evaluator", choices=EVALUATOR_CHOICES, default="vm",
+                        help="Evaluator to time; 'all' times every evaluator in the same run")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Minimum seconds spent timing each stage")
+    parser.add_argument("--profile", metavar="PREFIX", help="Dump cProfile stats per stage to PREFIX_<stage>.prof")
+    parser.add_argument("--profile-top", type=int, default=15, help="Number of profile entries to print")
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare the results against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Throughput drop in percent reported as a regression")
+    args = parser.parse_args()
+
+    if args.parser == "recursive" or args.evaluator in ("tree", "all"):
+        # Recursive stages need about two frames per level of the tree
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * args.size + 100))
+
+    report = run_benchmark(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults have been written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare_reports(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Run command to evaluate a file of expressions: python bulk.py expressions.txt > results.txt
+# or stream them through stdin: cat expressions.txt | python bulk.py
+
+
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from interpreter import LexicalError, ParsingError, VirtualMachine, compile
+
+
+def evaluate_line(line: str) -> str:
+    """Evaluates one expression and formats either its result or its error."""
+    try:
+        return str(VirtualMachine().run(compile(line)))
+    except (LexicalError, ParsingError, ZeroDivisionError) as e:
+        return f"{type(e).__name__}: {e}"
+    except Exception as e:
+        return f"Error: {e}"
+
+
+def evaluate_chunk(lines: list[str]) -> str:
+    """Evaluates a chunk of expressions inside a worker process.
+
+    Returns:
+        str: One output line per input line, newline-terminated.
+    """
+    return "".join(evaluate_line(line) + "\n" for line in lines)
+
+
+def read_chunks(stream, chunk_size: int):
+    """Lazily yields lists of at most `chunk_size` lines without trailing newlines."""
+    lines = (line.rstrip("\r\n") for line in stream)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def evaluate_stream(stream, output, workers: int, chunk_size: int) -> None:
+    """Evaluates every line of `stream` across a process pool, writing results in input order.
+
+    At most `2 * workers` chunks are in flight at a time, so memory use does not
+    depend on the size of the input.
+    """
+    max_pending = 2 * workers
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in read_chunks(stream, chunk_size):
+            pending.append(executor.submit(evaluate_chunk, chunk))
+            if len(pending) >= max_pending:
+                output.write(pending.popleft().result())
+        while pending:
+            output.write(pending.popleft().result())
+    output.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate arithmetic expressions in bulk, one per line")
+    parser.add_argument("input", nargs="?", default="-", help="Input file path, '-' for stdin (default)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Lines per task sent to a worker")
+    args = parser.parse_args()
+
+    if args.input == "-":
+        evaluate_stream(sys.stdin, sys.stdout, args.workers, args.chunk_size)
+    else:
+        with open(args.input, "r", encoding="utf-8") as file:
+            evaluate_stream(file, sys.stdout, args.workers, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import random
+
+from interpreter import LexicalError, TokenType, LEXER_BACKENDS
+
+ALPHABET = "0123456789" * 3 + "+-*/()" * 2 + " \t\n" + "xy_$.,^"
+
+
+def token_stream(lexer_class, text: str) -> tuple[list, tuple | None]:
+    """Drains a lexer and returns its (type, value) pairs and the error, if any."""
+    lexer = lexer_class(text)
+    tokens = []
+    try:
+        while True:
+            token = lexer.get_next_token()
+            tokens.append((token.type, token.value))
+            if token.type == TokenType.EOF:
+                return tokens, None
+    except LexicalError as e:
+        return tokens, (str(e), e.pos)
+
+
+def fuzz_lexers(iterations: int, max_length: int, seed: int) -> int:
+    """Compares every lexer backend against the character lexer on random input.
+
+    Returns:
+        int: Number of inputs on which a backend disagreed with the reference.
+    """
+    rng = random.Random(seed)
+    reference = LEXER_BACKENDS["char"]
+    failures = 0
+    for _ in range(iterations):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length)))
+        expected = token_stream(reference, text)
+        for name, lexer_class in LEXER_BACKENDS.items():
+            actual = token_stream(lexer_class, text)
+            if actual != expected:
+                failures += 1
+                print(f"Mismatch for backend '{name}' on {text!r}:\n  expected {expected}\n  actual   {actual}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzz the lexer backends against each other")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--max-length", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = fuzz_lexers(args.iterations, args.max_length, args.seed)
+    print(f"{args.iterations} inputs, {failures} mismatches")
+    raise SystemExit(1 if failures else 0)
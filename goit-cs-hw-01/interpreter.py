@@ -1,6 +1,12 @@
+import re
+from collections import OrderedDict
+
+
 class LexicalError(Exception):
     """Raised when an unknown character is encountered during lexical analysis."""
-    pass
+    def __init__(self, message, pos=None):
+        super().__init__(message)
+        self.pos = pos
 
 
 class ParsingError(Exception):
@@ -10,6 +16,7 @@ class ParsingError(Exception):
 
 class TokenType:
     INTEGER = "INTEGER"
+    ID = "ID"
     PLUS = "PLUS"
     MINUS = "MINUS"
     MUL = "MUL"
@@ -19,16 +26,41 @@ class TokenType:
     EOF = "EOF"
 
 
-class Token:
+class Immutable:
+    """Base for slotted objects whose attributes cannot change after __init__."""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+class Token(Immutable):
     """Represents a token with type and value."""
+    __slots__ = ("type", "value")
+
     def __init__(self, type_, value):
-        self.type = type_
-        self.value = value
+        object.__setattr__(self, "type", type_)
+        object.__setattr__(self, "value", value)
 
     def __str__(self):
         return f"Token({self.type}, {repr(self.value)})"
 
 
+# Operators, parentheses and EOF carry no data, so one shared instance of each is enough
+OPERATOR_TOKENS = {
+    "+": Token(TokenType.PLUS, "+"),
+    "-": Token(TokenType.MINUS, "-"),
+    "*": Token(TokenType.MUL, "*"),
+    "/": Token(TokenType.DIV, "/"),
+    "(": Token(TokenType.LPAREN, "("),
+    ")": Token(TokenType.RPAREN, ")"),
+}
+EOF_TOKEN = Token(TokenType.EOF, None)
+
+
 class Lexer:
     """Responsible for converting input string into a stream of tokens."""
     def __init__(self, text):
@@ -54,6 +86,13 @@ class Lexer:
             self.advance()
         return int(result)
 
+    def identifier(self):
+        """Read a variable name made of letters, digits and underscores."""
+        start = self.pos
+        while self.current_char is not None and (self.current_char.isalnum() or self.current_char == "_"):
+            self.advance()
+        return self.text[start:self.pos]
+
     def get_next_token(self):
         """Lexical analyzer that breaks input into tokens."""
         while self.current_char is not None:
@@ -64,53 +103,130 @@ class Lexer:
             if self.current_char.isdigit():
                 return Token(TokenType.INTEGER, self.integer())
 
-            if self.current_char == "+":
-                self.advance()
-                return Token(TokenType.PLUS, "+")
+            if self.current_char.isalpha() or self.current_char == "_":
+                return Token(TokenType.ID, self.identifier())
 
-            if self.current_char == "-":
+            token = OPERATOR_TOKENS.get(self.current_char)
+            if token is not None:
                 self.advance()
-                return Token(TokenType.MINUS, "-")
+                return token
 
-            if self.current_char == "*":
-                self.advance()
-                return Token(TokenType.MUL, "*")
+            raise LexicalError(f"Unknown character: {self.current_char}", self.pos)
 
-            if self.current_char == "/":
-                self.advance()
-                return Token(TokenType.DIV, "/")
+        return EOF_TOKEN
 
-            if self.current_char == "(":
-                self.advance()
-                return Token(TokenType.LPAREN, "(")
 
-            if self.current_char == ")":
-                self.advance()
-                return Token(TokenType.RPAREN, ")")
+# Integers, identifiers or any other single non-whitespace character;
+# whitespace is skipped by findall.
+TOKEN_REGEX = re.compile(r"\d+|[^\W\d]\w*|\S")
+
 
-            raise LexicalError(f"Unknown character: {self.current_char}")
+class RegexLexer:
+    """Single-pass lexer that scans the whole input with one compiled regex.
+
+    All tokens are collected up front into a list.
+    A lexical error stops the scan and is raised only when the parser asks
+    for the token at that position, so both lexers fail on the same inputs.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.tokens = []
+        self.error = None
+        self.index = 0
+        self.tokenize()
+
+    def tokenize(self):
+        append = self.tokens.append
+        operator_token = OPERATOR_TOKENS.get
+        for lexeme in TOKEN_REGEX.findall(self.text):
+            token = operator_token(lexeme)
+            if token is not None:
+                append(token)
+            elif lexeme[0].isdecimal():
+                append(Token(TokenType.INTEGER, int(lexeme)))
+            elif lexeme[0].isalpha() or lexeme[0] == "_":
+                append(Token(TokenType.ID, lexeme))
+            else:
+                self.error = LexicalError(f"Unknown character: {lexeme}", self.position_of(len(self.tokens)))
+                break
 
-        return Token(TokenType.EOF, None)
+    def position_of(self, index):
+        """Return the text offset of the lexeme with the given index."""
+        for i, match in enumerate(TOKEN_REGEX.finditer(self.text)):
+            if i == index:
+                return match.start()
 
+    def get_next_token(self):
+        """Return the next pre-scanned token."""
+        index = self.index
+        if index < len(self.tokens):
+            self.index = index + 1
+            return self.tokens[index]
+        if self.error is not None:
+            raise self.error
+        return EOF_TOKEN
+
+
+class TokenStream:
+    """Lexer interface over an already scanned list of tokens."""
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
 
-class AST:
+    def get_next_token(self):
+        index = self.index
+        if index < len(self.tokens):
+            self.index = index + 1
+            return self.tokens[index]
+        return EOF_TOKEN
+
+
+LEXER_BACKENDS = {
+    "char": Lexer,
+    "regex": RegexLexer,
+}
+
+
+def make_lexer(text, backend="regex"):
+    """Create a lexer for `text` using one of LEXER_BACKENDS."""
+    try:
+        lexer_class = LEXER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown lexer backend: {backend}") from None
+    return lexer_class(text)
+
+
+class AST(Immutable):
     """Base class for all AST nodes."""
-    pass
+    __slots__ = ()
 
 
 class BinOp(AST):
     """Represents a binary operation node in the AST."""
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op_token, right):
-        self.left = left
-        self.op = op_token
-        self.right = right
+        object.__setattr__(self, "left", left)
+        object.__setattr__(self, "op", op_token)
+        object.__setattr__(self, "right", right)
 
 
 class Num(AST):
     """Represents an integer number node in the AST."""
+    __slots__ = ("token", "value")
+
+    def __init__(self, token):
+        object.__setattr__(self, "token", token)
+        object.__setattr__(self, "value", token.value)
+
+
+class Var(AST):
+    """Represents a variable reference node in the AST."""
+    __slots__ = ("token", "name")
+
     def __init__(self, token):
-        self.token = token
-        self.value = token.value
+        object.__setattr__(self, "token", token)
+        object.__setattr__(self, "name", token.value)
 
 
 class Parser:
@@ -130,11 +246,14 @@ class Parser:
             self.error()
 
     def factor(self):
-        """factor : INTEGER | LPAREN expr RPAREN"""
+        """factor : INTEGER | ID | LPAREN expr RPAREN"""
         token = self.current_token
         if token.type == TokenType.INTEGER:
             self.eat(TokenType.INTEGER)
             return Num(token)
+        elif token.type == TokenType.ID:
+            self.eat(TokenType.ID)
+            return Var(token)
         elif token.type == TokenType.LPAREN:
             self.eat(TokenType.LPAREN)
             node = self.expr()
@@ -168,10 +287,76 @@ class Parser:
         return node
 
 
+OPERATOR_PRECEDENCE = {
+    TokenType.PLUS: 1,
+    TokenType.MINUS: 1,
+    TokenType.MUL: 2,
+    TokenType.DIV: 2,
+}
+
+
+class IterativeParser(Parser):
+    """Shunting-yard parser that builds the same tree as Parser without recursion.
+
+    Tokens are consumed in exactly the same order as the recursive parser,
+    so the resulting trees and ParsingError/LexicalError behaviour match,
+    including stopping at the first token that cannot continue the expression.
+    """
+    def expr(self):
+        values = []
+        operators = []  # operator tokens, None marks an open parenthesis
+        depth = 0
+
+        def reduce(min_precedence):
+            while operators and operators[-1] is not None \
+                    and OPERATOR_PRECEDENCE[operators[-1].type] >= min_precedence:
+                op_token = operators.pop()
+                right = values.pop()
+                left = values.pop()
+                values.append(BinOp(left=left, op_token=op_token, right=right))
+
+        while True:
+            # Expect an operand: INTEGER, ID or an opening parenthesis
+            token = self.current_token
+            if token.type == TokenType.LPAREN:
+                self.eat(TokenType.LPAREN)
+                operators.append(None)
+                depth += 1
+                continue
+            if token.type == TokenType.INTEGER:
+                self.eat(TokenType.INTEGER)
+                values.append(Num(token))
+            elif token.type == TokenType.ID:
+                self.eat(TokenType.ID)
+                values.append(Var(token))
+            else:
+                self.error()
+
+            # Expect an operator, a closing parenthesis or the end of the expression
+            while True:
+                token = self.current_token
+                if token.type == TokenType.RPAREN and depth:
+                    self.eat(TokenType.RPAREN)
+                    reduce(1)
+                    operators.pop()
+                    depth -= 1
+                    continue
+                if token.type in OPERATOR_PRECEDENCE:
+                    self.eat(token.type)
+                    reduce(OPERATOR_PRECEDENCE[token.type])
+                    operators.append(token)
+                    break
+                if depth:
+                    self.error()
+                reduce(1)
+                return values[-1]
+
+
 class Interpreter:
     """Interprets (evaluates) the abstract syntax tree."""
-    def __init__(self, parser):
+    def __init__(self, parser, variables=None):
         self.parser = parser
+        self.variables = variables if variables is not None else {}
 
     def visit(self, node):
         """Dispatch method to call the appropriate visit_ method."""
@@ -197,6 +382,12 @@ class Interpreter:
     def visit_Num(self, node):
         return node.value
 
+    def visit_Var(self, node):
+        try:
+            return self.variables[node.name]
+        except KeyError:
+            raise NameError(f"Undefined variable: {node.name}") from None
+
     def generic_visit(self, node):
         raise Exception(f"No visit_{type(node).__name__} method")
 
@@ -206,18 +397,492 @@ class Interpreter:
         return self.visit(tree)
 
 
+class IterativeInterpreter(Interpreter):
+    """Evaluates the tree in post-order with an explicit stack instead of recursion."""
+    def visit(self, node):
+        values = []
+        stack = [(node, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if isinstance(node, Num):
+                values.append(node.value)
+            elif isinstance(node, Var):
+                values.append(self.visit_Var(node))
+            elif isinstance(node, BinOp):
+                if not children_done:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+                    continue
+                right = values.pop()
+                left = values.pop()
+                op_type = node.op.type
+                if op_type == TokenType.PLUS:
+                    values.append(left + right)
+                elif op_type == TokenType.MINUS:
+                    values.append(left - right)
+                elif op_type == TokenType.MUL:
+                    values.append(left * right)
+                elif op_type == TokenType.DIV:
+                    if right == 0:
+                        raise ZeroDivisionError("Division by zero is not allowed")
+                    values.append(left / right)
+            else:
+                self.generic_visit(node)
+        return values[-1]
+
+
+class OpCode:
+    PUSH = 0
+    ADD = 1
+    SUB = 2
+    MUL = 3
+    DIV = 4
+    LOAD = 5
+
+
+BINARY_OPCODES = {
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUB,
+    TokenType.MUL: OpCode.MUL,
+    TokenType.DIV: OpCode.DIV,
+}
+
+
+class Program:
+    """Flat postfix instruction array produced by the Compiler.
+
+    `code[i]` is an OpCode and `operands[i]` is its argument
+    (the constant for PUSH, the variable name for LOAD,
+    None for arithmetic instructions).
+    """
+    def __init__(self, code, operands):
+        self.code = code
+        self.operands = operands
+
+    def __len__(self):
+        return len(self.code)
+
+
+class Compiler:
+    """Compiles the abstract syntax tree into a flat Program."""
+    def compile(self, tree):
+        """Emit instructions in post-order using an explicit stack."""
+        code = []
+        operands = []
+        stack = [(tree, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if isinstance(node, Num):
+                code.append(OpCode.PUSH)
+                operands.append(node.value)
+            elif isinstance(node, Var):
+                code.append(OpCode.LOAD)
+                operands.append(node.name)
+            elif isinstance(node, BinOp):
+                if children_done:
+                    code.append(BINARY_OPCODES[node.op.type])
+                    operands.append(None)
+                else:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+            else:
+                raise Exception(f"No compile rule for {type(node).__name__}")
+        return Program(code, operands)
+
+
+class VirtualMachine:
+    """Executes a compiled Program on a value stack."""
+    def run(self, program, variables=None):
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for opcode, operand in zip(program.code, program.operands):
+            if opcode == OpCode.PUSH:
+                push(operand)
+                continue
+            if opcode == OpCode.LOAD:
+                if variables is None or operand not in variables:
+                    raise NameError(f"Undefined variable: {operand}")
+                push(variables[operand])
+                continue
+            right = pop()
+            left = pop()
+            if opcode == OpCode.ADD:
+                push(left + right)
+            elif opcode == OpCode.SUB:
+                push(left - right)
+            elif opcode == OpCode.MUL:
+                push(left * right)
+            else:
+                if right == 0:
+                    raise ZeroDivisionError("Division by zero is not allowed")
+                push(left / right)
+        return stack[-1]
+
+
+def is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def normalize_expression(text):
+    """Strip whitespace that does not separate two integers or names."""
+    parts = text.split()
+    if not parts:
+        return ""
+    normalized = [parts[0]]
+    for previous, part in zip(parts, parts[1:]):
+        if is_word_char(previous[-1]) and is_word_char(part[0]):
+            normalized.append(" ")
+        normalized.append(part)
+    return "".join(normalized)
+
+
+class ExpressionCache:
+    """Bounded LRU cache of compiled programs keyed by normalized expression text."""
+    def __init__(self, maxsize=1024, lexer_backend="regex"):
+        self.maxsize = maxsize
+        self.lexer_backend = lexer_backend
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def compile(self, text):
+        """Return the cached Program for `text`, compiling it on a miss."""
+        key = normalize_expression(text)
+        program = self.entries.get(key)
+        if program is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return program
+
+        self.misses += 1
+        # Lex the text as given so that error positions point into it, not into the key
+        program = Compiler().compile(IterativeParser(make_lexer(text, self.lexer_backend)).expr())
+        self.entries[key] = program
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return program
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+expression_cache = ExpressionCache()
+
+
+def compile(text):
+    """Compile expression text into a Program through the shared cache."""
+    return expression_cache.compile(text)
+
+
+def apply_operator(op_type, left, right):
+    """Apply a binary operator with the same semantics as Interpreter.visit_BinOp."""
+    if op_type == TokenType.PLUS:
+        return left + right
+    if op_type == TokenType.MINUS:
+        return left - right
+    if op_type == TokenType.MUL:
+        return left * right
+    if right == 0:
+        raise ZeroDivisionError("Division by zero is not allowed")
+    return left / right
+
+
+def common_prefix_length(a, b):
+    """Length of the longest common prefix, found by binary search over C-level slice comparisons."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix_length(a, b, limit):
+    """Length of the longest common suffix, at most `limit` characters."""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class OffsetIndex:
+    """Token start offsets that can be shifted for all tokens after an index in O(log n).
+
+    Each offset is stored as a base value plus the prefix sum of a Fenwick tree
+    of pending shifts, so an edit that changes the text length does not have to
+    rewrite the offsets of every following token.
+    """
+    def __init__(self, starts):
+        self.base = list(starts)
+        self.shifts = [0] * (len(starts) + 1)
+
+    def __len__(self):
+        return len(self.base)
+
+    def shift_from(self, index, delta):
+        """Add `delta` to the offsets of all tokens with position >= index."""
+        index += 1
+        while index < len(self.shifts):
+            self.shifts[index] += delta
+            index += index & -index
+
+    def pending_shift(self, index):
+        index += 1
+        total = 0
+        while index > 0:
+            total += self.shifts[index]
+            index -= index & -index
+        return total
+
+    def __getitem__(self, index):
+        return self.base[index] + self.pending_shift(index)
+
+    def __setitem__(self, index, start):
+        self.base[index] = start - self.pending_shift(index)
+
+
+def make_token(lexeme):
+    """Build the token for a lexeme matched by TOKEN_REGEX, or None for an unknown character."""
+    token = OPERATOR_TOKENS.get(lexeme)
+    if token is not None:
+        return token
+    if lexeme[0].isdecimal():
+        return Token(TokenType.INTEGER, int(lexeme))
+    if lexeme[0].isalpha() or lexeme[0] == "_":
+        return Token(TokenType.ID, lexeme)
+    return None
+
+
+class IncrementalSession:
+    """Re-evaluates edited expressions by reusing the previous tree and subtree values.
+
+    After a full evaluation the session keeps the tokens with their offsets, the
+    tree, a parent link and the cached value of every node. When the next text
+    differs only inside a region whose re-lexed tokens have the same types as
+    before (typically an edited number), only that region is re-lexed, the changed
+    leaves are replaced and just their paths to the root are rebuilt and
+    re-evaluated. Any other edit falls back to a full parse.
+
+    Cached values depend on `variables`, so the session keeps a copy of them and
+    re-evaluates from scratch whenever the dict has changed since the last call.
+    """
+    def __init__(self, variables=None):
+        self.variables = variables if variables is not None else {}
+        self.reset()
+
+    def reset(self):
+        self.text = None
+        self.tokens = None
+        self.starts = None
+        self.lengths = None
+        self.leaf_index = None
+        self.leaves = None
+        self.parents = None
+        self.values = None
+        self.root = None
+        self.snapshot = None
+
+    def evaluate(self, text):
+        """Evaluate `text`, incrementally when the previous state allows it."""
+        try:
+            if self.text is not None and self.variables == self.snapshot and self.update(text):
+                return self.values[self.root]
+            return self.rebuild(text)
+        except Exception:
+            self.reset()
+            raise
+
+    def scan(self, text, offset):
+        """Lex `text` into tokens with offsets shifted by `offset`, or None on an unknown character."""
+        tokens, starts, lengths = [], [], []
+        for match in TOKEN_REGEX.finditer(text):
+            token = make_token(match.group())
+            if token is None:
+                return None
+            tokens.append(token)
+            starts.append(match.start() + offset)
+            lengths.append(match.end() - match.start())
+        return tokens, starts, lengths
+
+    def rebuild(self, text):
+        """Fully lex, parse and evaluate `text`, caching everything needed for later edits."""
+        self.reset()
+        scanned = self.scan(text, 0)
+        if scanned is None:
+            # Lexical errors are reported by the regular pipeline
+            return VirtualMachine().run(compile(text), self.variables)
+        tokens, starts, lengths = scanned
+        parser = IterativeParser(TokenStream(tokens))
+        root = parser.expr()
+        if parser.current_token is not EOF_TOKEN:
+            # Trailing tokens are ignored by the grammar and have no leaf to update
+            return VirtualMachine().run(compile(text), self.variables)
+
+        values = {}
+        parents = {}
+        leaves = []
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if isinstance(node, BinOp):
+                if not children_done:
+                    parents[node.left] = (node, True)
+                    parents[node.right] = (node, False)
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+                else:
+                    values[node] = apply_operator(node.op.type, values[node.left], values[node.right])
+            else:
+                leaves.append(node)
+                values[node] = self.leaf_value(node)
+
+        leaf_index = []
+        count = 0
+        for token in tokens:
+            if token.type in (TokenType.INTEGER, TokenType.ID):
+                leaf_index.append(count)
+                count += 1
+            else:
+                leaf_index.append(None)
+
+        self.text = text
+        self.tokens = tokens
+        self.starts = OffsetIndex(starts)
+        self.lengths = lengths
+        self.leaf_index = leaf_index
+        self.leaves = leaves
+        self.parents = parents
+        self.values = values
+        self.root = root
+        self.snapshot = dict(self.variables)
+        return values[root]
+
+    def leaf_value(self, node):
+        if isinstance(node, Num):
+            return node.value
+        try:
+            return self.variables[node.name]
+        except KeyError:
+            raise NameError(f"Undefined variable: {node.name}") from None
+
+    def first_token_ending_at_or_after(self, position):
+        low, high = 0, len(self.tokens)
+        while low < high:
+            middle = (low + high) // 2
+            if self.starts[middle] + self.lengths[middle] >= position:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def last_token_starting_at_or_before(self, position):
+        low, high = 0, len(self.tokens)
+        while low < high:
+            middle = (low + high) // 2
+            if self.starts[middle] <= position:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def update(self, text):
+        """Apply an edit in place. Returns False when a full rebuild is needed."""
+        old_text = self.text
+        if text == old_text:
+            return True
+        prefix = common_prefix_length(old_text, text)
+        suffix = common_suffix_length(old_text, text, min(len(old_text), len(text)) - prefix)
+        old_end = len(old_text) - suffix
+        delta = len(text) - len(old_text)
+
+        # Re-lex every token that touches the changed region, including neighbours
+        # that end or start right at its edges, since they might merge with it.
+        first = self.first_token_ending_at_or_after(prefix)
+        last = self.last_token_starting_at_or_before(old_end)
+        region_start, region_end = prefix, old_end
+        if first <= last:
+            region_start = min(prefix, self.starts[first])
+            region_end = max(old_end, self.starts[last] + self.lengths[last])
+        scanned = self.scan(text[region_start:region_end + delta], region_start)
+        if scanned is None:
+            return False
+        new_tokens, new_starts, new_lengths = scanned
+
+        old_tokens = self.tokens[first:last + 1]
+        if len(new_tokens) != len(old_tokens):
+            return False
+        if any(new.type != old.type for new, old in zip(new_tokens, old_tokens)):
+            return False
+
+        self.starts.shift_from(last + 1, delta)
+        for index, token, start, length in zip(range(first, last + 1), new_tokens, new_starts, new_lengths):
+            self.starts[index] = start
+            self.lengths[index] = length
+            if token.value != self.tokens[index].value:
+                self.tokens[index] = token
+                self.replace_leaf(self.leaf_index[index], token)
+        self.text = text
+        return True
+
+    def replace_leaf(self, index, token):
+        """Swap one leaf and rebuild the path to the root, reusing cached sibling values."""
+        old = self.leaves[index]
+        node = Num(token) if token.type == TokenType.INTEGER else Var(token)
+        value = self.leaf_value(node)
+        self.leaves[index] = node
+        while True:
+            link = self.parents.pop(old, None)
+            del self.values[old]
+            self.values[node] = value
+            if link is None:
+                self.root = node
+                return
+            parent, is_left = link
+            if is_left:
+                sibling = parent.right
+                new_parent = BinOp(left=node, op_token=parent.op, right=sibling)
+                value = apply_operator(parent.op.type, value, self.values[sibling])
+            else:
+                sibling = parent.left
+                new_parent = BinOp(left=sibling, op_token=parent.op, right=node)
+                value = apply_operator(parent.op.type, self.values[sibling], value)
+            self.parents[node] = (new_parent, is_left)
+            self.parents[sibling] = (new_parent, not is_left)
+            old, node = parent, new_parent
+
+
 def main():
     """Command-line interface loop for evaluating arithmetic expressions."""
+    session = IncrementalSession()
     while True:
         try:
             text = input("Enter an expression (or 'exit' to quit): ")
             if text.lower() == "exit":
                 print("Exiting.")
                 break
-            lexer = Lexer(text)
-            parser = Parser(lexer)
-            interpreter = Interpreter(parser)
-            result = interpreter.interpret()
+            result = session.evaluate(text)
             print(f"Result: {result}")
         except ZeroDivisionError as zde:
             print(f"Math Error: {zde}")
@@ -0,0 +1,144 @@
+import sys
+
+from interpreter import BinOp, Num, Var, Token, TokenType, IterativeParser, RegexLexer
+
+
+def fold(op_type, left, right):
+    """Compute a constant BinOp, or return None when it must stay unfolded."""
+    if op_type == TokenType.PLUS:
+        return left + right
+    if op_type == TokenType.MINUS:
+        return left - right
+    if op_type == TokenType.MUL:
+        return left * right
+    if op_type == TokenType.DIV and right != 0:
+        return left / right
+    # Division by zero is left in the tree so that it still raises at evaluation time
+    return None
+
+
+def count_tree_nodes(tree):
+    """Count nodes of the tree as written, shared subtrees counted every time."""
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, BinOp):
+            stack.append(node.left)
+            stack.append(node.right)
+    return count
+
+
+def count_dag_nodes(root):
+    """Count distinct nodes reachable from the root."""
+    seen = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, BinOp):
+            stack.append(node.left)
+            stack.append(node.right)
+    return len(seen)
+
+
+class Optimizer:
+    """Hash-conses identical subtrees into a DAG and folds constant operations."""
+    def __init__(self):
+        self.table = {}
+        self.folded = 0
+
+    def key(self, node):
+        if isinstance(node, Num):
+            # repr() keeps 1, 1.0 and -0.0 apart, they print differently
+            return ("num", repr(node.value))
+        if isinstance(node, Var):
+            return ("var", node.name)
+        return (node.op.type, id(node.left), id(node.right))
+
+    def intern(self, node):
+        """Return the shared instance equal to `node`, registering it if new."""
+        return self.table.setdefault(self.key(node), node)
+
+    def optimize(self, tree):
+        """Return the root of the optimized DAG for `tree`."""
+        results = []
+        stack = [(tree, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if isinstance(node, (Num, Var)):
+                results.append(self.intern(node))
+            elif isinstance(node, BinOp):
+                if not children_done:
+                    stack.append((node, True))
+                    stack.append((node.right, False))
+                    stack.append((node.left, False))
+                    continue
+                right = results.pop()
+                left = results.pop()
+                value = None
+                if isinstance(left, Num) and isinstance(right, Num):
+                    value = fold(node.op.type, left.value, right.value)
+                if value is not None:
+                    self.folded += 1
+                    results.append(self.intern(Num(Token(TokenType.INTEGER, value))))
+                else:
+                    results.append(self.intern(BinOp(left=left, op_token=node.op, right=right)))
+            else:
+                raise Exception(f"No optimize rule for {type(node).__name__}")
+        return results[-1]
+
+
+def optimize(tree):
+    """Optimize a tree and report node counts before and after."""
+    optimizer = Optimizer()
+    root = optimizer.optimize(tree)
+    stats = {
+        "nodes_before": count_tree_nodes(tree),
+        "nodes_after": count_dag_nodes(root),
+        "folded": optimizer.folded,
+    }
+    return root, stats
+
+
+def evaluate_dag(root, variables=None):
+    """Evaluate a DAG so that every distinct node is computed exactly once."""
+    variables = variables if variables is not None else {}
+    memo = {}
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if id(node) in memo:
+            continue
+        if isinstance(node, Num):
+            memo[id(node)] = node.value
+        elif isinstance(node, Var):
+            if node.name not in variables:
+                raise NameError(f"Undefined variable: {node.name}")
+            memo[id(node)] = variables[node.name]
+        elif not children_done:
+            stack.append((node, True))
+            stack.append((node.right, False))
+            stack.append((node.left, False))
+        else:
+            value = fold(node.op.type, memo[id(node.left)], memo[id(node.right)])
+            if value is None:
+                raise ZeroDivisionError("Division by zero is not allowed")
+            memo[id(node)] = value
+    return memo[id(root)]
+
+
+if __name__ == "__main__":
+    for text in sys.argv[1:] or ["(3*4)+(3*4)*(3*4)", "(x*4)+(x*4)*(x*4)", "(1/0)+(1/0)*(1/0)"]:
+        tree = IterativeParser(RegexLexer(text)).expr()
+        root, stats = optimize(tree)
+        print(f"{text}: {stats}")
+        try:
+            print(f"  result: {evaluate_dag(root, {'x': 3})}")
+        except ZeroDivisionError as zde:
+            print(f"  Math Error: {zde}")
+        except NameError as ne:
+            print(f"  Error: {ne}")
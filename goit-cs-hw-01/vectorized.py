@@ -0,0 +1,164 @@
+import time
+
+import numpy as np
+
+from interpreter import OpCode, compile
+
+ZERO_DIVISION_POLICIES = ("raise", "nan", "mask")
+INT64_MAX = np.iinfo(np.int64).max
+
+
+class Int64Overflow(Exception):
+    """An int64 operation wrapped around; the expression has to be evaluated with Python integers."""
+
+
+def as_column(values):
+    """Convert a column to a float, int64 or (for integers beyond int64) object array.
+
+    Booleans and narrower integer types are widened to int64 so that they do
+    not wrap around sooner and add like the interpreter's integers.
+    """
+    array = np.asarray(values)
+    kind = array.dtype.kind
+    if kind == "u" and array.size and array.max() > INT64_MAX:
+        return array.astype(object)
+    if kind in "biu":
+        return array.astype(np.int64, copy=False)
+    return array
+
+
+def divide(left, right, on_zero_division):
+    """Element-wise true division with the requested division-by-zero policy."""
+    zero = np.equal(right, 0)
+    if on_zero_division == "raise":
+        if np.any(zero):
+            raise ZeroDivisionError("Division by zero is not allowed")
+        return np.true_divide(left, right)
+
+    # Rows with a zero divisor are divided by 1 and replaced afterwards, since Python
+    # integers in object columns raise on division by zero instead of giving inf or NaN.
+    # Masked arrays are divided as plain data: np.ma's own division also masks int64 rows
+    # holding the smallest int64, whose absolute value wraps around.
+    zero = np.ma.getdata(zero)
+    with np.errstate(invalid="ignore"):
+        result = np.true_divide(np.ma.getdata(left), np.where(zero, 1, np.ma.getdata(right)))
+    if on_zero_division == "mask":
+        return np.ma.array(result, mask=zero | np.ma.getmask(left) | np.ma.getmask(right))
+    return np.where(zero, np.nan, result)
+
+
+def magnitude(value):
+    """Largest absolute value in an int64 column or scalar, as a Python int."""
+    array = np.asarray(value)
+    if not array.size:
+        return 0
+    return max(abs(int(array.max())), abs(int(array.min())))
+
+
+def checked_int64(opcode, left, right, result):
+    """Raise Int64Overflow if an int64 ADD, SUB or MUL result wrapped around.
+
+    Bounds from the operands' largest magnitudes settle the common case with two
+    reductions per operand; rows are only checked one by one when they do not.
+    """
+    if np.asarray(result).dtype != np.int64:
+        return result
+    if opcode == OpCode.MUL:
+        if magnitude(left) * magnitude(right) <= INT64_MAX:
+            return result
+        # Exact enough to tell products well inside the int64 range from those that might not be
+        wrapped = np.abs(np.multiply(np.asarray(left, dtype=np.float64), right)) >= 2.0 ** 62
+    else:
+        if magnitude(left) + magnitude(right) <= INT64_MAX:
+            return result
+        if opcode == OpCode.ADD:
+            # The sum has a different sign than both operands
+            wrapped = np.bitwise_and(np.bitwise_xor(left, result), np.bitwise_xor(right, result)) < 0
+        else:
+            wrapped = np.bitwise_and(np.bitwise_xor(left, right), np.bitwise_xor(left, result)) < 0
+    if np.any(wrapped):
+        raise Int64Overflow
+    return result
+
+
+def run(program, arrays, on_zero_division):
+    """Run a compiled program over whole columns and return the value left on the stack."""
+    stack = []
+    for opcode, operand in zip(program.code, program.operands):
+        if opcode == OpCode.PUSH:
+            stack.append(operand)
+            continue
+        if opcode == OpCode.LOAD:
+            if operand not in arrays:
+                raise NameError(f"Undefined variable: {operand}")
+            stack.append(arrays[operand])
+            continue
+        right = stack.pop()
+        left = stack.pop()
+        if opcode == OpCode.ADD:
+            stack.append(checked_int64(opcode, left, right, np.add(left, right)))
+        elif opcode == OpCode.SUB:
+            stack.append(checked_int64(opcode, left, right, np.subtract(left, right)))
+        elif opcode == OpCode.MUL:
+            stack.append(checked_int64(opcode, left, right, np.multiply(left, right)))
+        else:
+            stack.append(divide(left, right, on_zero_division))
+    return stack[-1]
+
+
+def evaluate_batch(expr, columns, on_zero_division="raise"):
+    """Evaluate one expression over whole NumPy columns at once.
+
+    The expression is compiled once (through the shared expression cache) and
+    every instruction is applied to entire columns with NumPy ufuncs, so the
+    Python loop runs once per instruction instead of once per row.
+
+    Integer columns are evaluated in int64. If any integer result would not fit,
+    the expression is evaluated again with Python integers (object arrays), which
+    gives the interpreter's exact values at a much lower speed.
+
+    Args:
+        expr (str): Arithmetic expression that may reference column names.
+        columns (dict[str, array-like]): Variable name to column of values.
+        on_zero_division (str): "raise" raises ZeroDivisionError if any row divides
+            by zero, "nan" puts NaN in those rows, "mask" returns a masked array
+            with those rows masked.
+
+    Returns:
+        numpy.ndarray: One result per row (numpy.ma.MaskedArray for "mask"), always a writable array.
+    """
+    if on_zero_division not in ZERO_DIVISION_POLICIES:
+        raise ValueError(f"Unknown division by zero policy: {on_zero_division}")
+
+    program = compile(expr)
+    arrays = {name: as_column(values) for name, values in columns.items()}
+    shape = np.broadcast_shapes(*(array.shape for array in arrays.values()))
+
+    try:
+        result = run(program, arrays, on_zero_division)
+    except (Int64Overflow, OverflowError):
+        # OverflowError: a literal that does not fit in int64
+        exact = {name: array.astype(object) if array.dtype == np.int64 else array
+                 for name, array in arrays.items()}
+        result = run(program, exact, on_zero_division)
+
+    if on_zero_division == "mask":
+        result = np.ma.asarray(result)
+        mask = np.ma.getmaskarray(result)
+        return np.ma.array(np.broadcast_to(result.data, shape), mask=np.broadcast_to(mask, shape), copy=True)
+    return np.array(np.broadcast_to(result, shape))
+
+if __name__ == "__main__":
+    rows = 1_000_000
+    rng = np.random.default_rng(0)
+    data = {"x": rng.integers(0, 100, rows), "y": rng.integers(0, 10, rows)}
+    expression = "(x * 3 + y) / (y - 5) - x"
+
+    for policy in ZERO_DIVISION_POLICIES:
+        start = time.perf_counter()
+        try:
+            values = evaluate_batch(expression, data, on_zero_division=policy)
+            elapsed = time.perf_counter() - start
+            print(f"{policy:>5}: {rows} rows in {elapsed:.4f} s, first values {values[:3]}")
+        except ZeroDivisionError as zde:
+            print(f"{policy:>5}: Math Error: {zde}")
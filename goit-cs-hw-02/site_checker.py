@@ -0,0 +1,146 @@
+# Run command to check the sites listed in task_1.sh: python site_checker.py
+# Thousands of URLs from a file (one per line): python site_checker.py --urls sites.txt --concurrency 200
+# Needs httpx: pip install httpx (pinned in task_2/Computer-Systems-hw02/requirements.txt)
+
+
+import argparse
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+
+HERE = Path(__file__).parent
+DEFAULT_URLS = HERE / "task_1.sh"
+DEFAULT_LOG = HERE / "website_status.log"
+# HEAD answers that mean "try GET instead" rather than "the site is down"
+HEAD_UNSUPPORTED = {403, 404, 405, 501}
+
+
+def load_websites(path: Path) -> list[str]:
+    """Read the WEBSITES=(...) array of a shell script, or a plain list with one URL at the start of each line."""
+    text = Path(path).read_text()
+    array = re.search(r"^\s*WEBSITES=\((.*?)\)", text, re.MULTILINE | re.DOTALL)
+    if array:
+        return re.findall(r"[\"']?(https?://[^\s\"')]+)", array.group(1))
+    return [line.split()[0] for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+
+@dataclass(frozen=True, slots=True)
+class SiteStatus:
+    url: str
+    up: bool
+    status: int | None
+    latency: float
+    error: str | None = None
+
+    def log_line(self) -> str:
+        """The task_1.sh line for this site, followed by the latency and the reason it is down."""
+        line = f"<{self.url}> is {'UP' if self.up else 'DOWN'} ({self.latency * 1e3:.0f} ms"
+        if not self.up:
+            line += f", {self.error or self.status}"
+        return line + ")"
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host so that no host gets more than `rate` per second.
+
+    Hosts are independent: waiting for a slow-to-allow host never delays requests to others.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_slot = {}
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        # Claim the slot before sleeping so concurrent callers queue up behind it
+        slot = max(now, self.next_slot.get(host, now))
+        self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def check_site(client: httpx.AsyncClient, url: str, limiter: HostRateLimiter,
+                     semaphore: asyncio.Semaphore) -> SiteStatus:
+    """Probe `url` with HEAD, falling back to GET, following redirects like `curl -L`.
+
+    The site is UP when the final response is 200, as in task_1.sh. GET responses are
+    streamed and closed without reading the body. A concurrency slot from `semaphore` is
+    only held while a request is in flight, never while waiting for the host's rate limit,
+    so a busy host cannot hold up the others. The latency is the time spent in requests.
+    A URL that cannot be parsed is reported DOWN like an unreachable one.
+    """
+    latency = 0.0
+
+    async def request(method):
+        nonlocal latency
+        await limiter.wait(host)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with client.stream(method, url, follow_redirects=True) as response:
+                    return response
+            finally:
+                latency += time.perf_counter() - start
+
+    try:
+        host = urlsplit(url).hostname or url
+        response = await request("HEAD")
+        if response.status_code in HEAD_UNSUPPORTED:
+            response = await request("GET")
+    except httpx.HTTPError as e:
+        return SiteStatus(url, False, None, latency, type(e).__name__)
+    except (httpx.InvalidURL, ValueError) as e:
+        return SiteStatus(url, False, None, latency, f"invalid URL: {e}")
+    return SiteStatus(url, response.status_code == 200, response.status_code, latency)
+
+
+async def check_sites(urls: list[str], concurrency: int = 100, per_host_rate: float = 5.0,
+                      timeout: float = 10.0, on_result=None) -> list[SiteStatus]:
+    """Check every URL with at most `concurrency` requests in flight over one keep-alive pool.
+
+    `on_result` is called with each SiteStatus as soon as it is known; the returned list is in input order.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    limiter = HostRateLimiter(per_host_rate)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(url):
+        result = await check_site(client, url, limiter, semaphore)
+        if on_result:
+            on_result(result)
+        return result
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        return await asyncio.gather(*(check(url) for url in urls))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check website availability concurrently")
+    parser.add_argument("--urls", type=Path, default=DEFAULT_URLS,
+                        help="Shell script with a WEBSITES=(...) array, or a file with one URL per line")
+    parser.add_argument("--log", type=Path, default=DEFAULT_LOG, help="Status log, rewritten on every run")
+    parser.add_argument("--concurrency", type=int, default=100, help="Requests in flight at once")
+    parser.add_argument("--per-host-rate", type=float, default=5.0,
+                        help="Requests per second allowed to one host (0: unlimited)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+
+    urls = load_websites(args.urls)
+    start = time.perf_counter()
+    results = asyncio.run(check_sites(urls, args.concurrency, args.per_host_rate, args.timeout,
+                                      on_result=lambda result: print(result.log_line())))
+    args.log.write_text("".join(result.log_line() + "\n" for result in results))
+    up = sum(result.up for result in results)
+    print(f"{up}/{len(results)} sites UP in {time.perf_counter() - start:.2f} s")
+    print(f"Results have been written to {args.log}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# Run command to monitor the sites listed in task_1.sh every 60 s: python site_monitor.py run
+# Per-site intervals come from a URL file with "<url> <seconds>" lines: python site_monitor.py run --urls sites.txt
+# Uptime and latency percentiles over the last day: python site_monitor.py report --since 24
+# Needs httpx: pip install httpx (pinned in task_2/Computer-Systems-hw02/requirements.txt)
+
+
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import math
+import random
+import re
+import signal
+import sqlite3
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+import httpx
+
+from site_checker import DEFAULT_URLS, HostRateLimiter, SiteStatus, check_site, load_websites
+
+logger = logging.getLogger("site_monitor")
+
+HERE = Path(__file__).parent
+DEFAULT_DB = HERE / "website_status.sqlite3"
+ROLLUP_SECONDS = 3600
+# Upper bounds (ms) of the latency histogram buckets kept per rollup, each 25% wider than the previous one;
+# percentiles read from them are accurate to one bucket
+LATENCY_BOUNDS = [round(1.25 ** i, 2) for i in range(50)]  # 1 ms .. ~55 s, plus an overflow bucket
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    id  INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS checks (
+    site_id    INTEGER NOT NULL REFERENCES sites (id),
+    ts         INTEGER NOT NULL,
+    up         INTEGER NOT NULL,
+    status     INTEGER,
+    latency_ms REAL NOT NULL,
+    error      TEXT
+);
+CREATE INDEX IF NOT EXISTS checks_site_ts ON checks (site_id, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    site_id    INTEGER NOT NULL REFERENCES sites (id),
+    bucket     INTEGER NOT NULL,
+    checks     INTEGER NOT NULL,
+    up         INTEGER NOT NULL,
+    latency_ms REAL NOT NULL,
+    histogram  TEXT NOT NULL,
+    PRIMARY KEY (site_id, bucket)
+) WITHOUT ROWID;
+"""
+
+
+def load_intervals(path: Path, default: float) -> dict[str, float]:
+    """Map every URL in `path` to its check interval; "<url> <seconds>" lines override `default`."""
+    overrides = dict(re.findall(r"^\s*(https?://\S+)\s+(\d+(?:\.\d+)?)\s*$", Path(path).read_text(), re.MULTILINE))
+    return {url: float(overrides.get(url, default)) for url in load_websites(path)}
+
+
+class StatusStore:
+    """Append-only check history in SQLite (WAL mode) with hourly rollups per site.
+
+    Every check is one row in `checks` and one upsert into the hour's `rollups` row, which holds the
+    check and UP counts, the latency sum and a latency histogram. Reports only read rollups, so their
+    cost depends on the time range asked for, not on how much history has been recorded.
+    """
+
+    def __init__(self, path: Path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL can lose the last checks on power loss, never corrupt the file
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.site_ids = {}
+
+    def site_id(self, url: str) -> int:
+        if url not in self.site_ids:
+            self.db.execute("INSERT OR IGNORE INTO sites (url) VALUES (?)", (url,))
+            self.site_ids[url] = self.db.execute("SELECT id FROM sites WHERE url = ?", (url,)).fetchone()[0]
+        return self.site_ids[url]
+
+    def record(self, result: SiteStatus, ts: float | None = None):
+        ts = int(ts if ts is not None else time.time())
+        site_id = self.site_id(result.url)
+        latency_ms = result.latency * 1e3
+        bucket = ts - ts % ROLLUP_SECONDS
+        with self.db:
+            self.db.execute("INSERT INTO checks VALUES (?, ?, ?, ?, ?, ?)",
+                            (site_id, ts, result.up, result.status, latency_ms, result.error))
+            row = self.db.execute("SELECT histogram FROM rollups WHERE site_id = ? AND bucket = ?",
+                                  (site_id, bucket)).fetchone()
+            histogram = json.loads(row[0]) if row else [0] * (len(LATENCY_BOUNDS) + 1)
+            histogram[bisect_left(LATENCY_BOUNDS, latency_ms)] += 1
+            self.db.execute(
+                "INSERT INTO rollups VALUES (?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT (site_id, bucket) DO UPDATE SET checks = checks + 1, up = up + excluded.up, "
+                "latency_ms = latency_ms + excluded.latency_ms, histogram = excluded.histogram",
+                (site_id, bucket, result.up, latency_ms, json.dumps(histogram, separators=(",", ":"))))
+
+    def report(self, since: float) -> list[dict]:
+        """Uptime percentage and latency percentiles per site over the rollups starting at or after `since`."""
+        since = int(since) - int(since) % ROLLUP_SECONDS
+        rows = self.db.execute(
+            "SELECT url, checks, rollups.up, latency_ms, histogram FROM rollups JOIN sites ON sites.id = site_id "
+            "WHERE bucket >= ? ORDER BY url", (since,))
+        merged = {}
+        for url, checks, up, latency_ms, histogram in rows:
+            site = merged.setdefault(url, {"checks": 0, "up": 0, "latency_ms": 0.0,
+                                           "histogram": [0] * (len(LATENCY_BOUNDS) + 1)})
+            site["checks"] += checks
+            site["up"] += up
+            site["latency_ms"] += latency_ms
+            site["histogram"] = [a + b for a, b in zip(site["histogram"], json.loads(histogram))]
+        return [{
+            "url": url,
+            "checks": site["checks"],
+            "uptime": 100 * site["up"] / site["checks"],
+            "mean_ms": site["latency_ms"] / site["checks"],
+            **{f"p{p}_ms": histogram_percentile(site["histogram"], p / 100) for p in (50, 95, 99)},
+        } for url, site in merged.items()]
+
+    def close(self):
+        self.db.close()
+
+
+def histogram_percentile(histogram: list[int], fraction: float) -> float:
+    """Upper bound of the bucket holding the nearest-rank percentile (inf for the overflow bucket)."""
+    rank = max(1, round(fraction * sum(histogram)))
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return LATENCY_BOUNDS[i] if i < len(LATENCY_BOUNDS) else float("inf")
+    return 0.0
+
+
+def next_delay(interval: float, failures: int, max_backoff: float, jitter: float) -> float:
+    """Seconds until the next check: `interval` doubled per consecutive failure up to `max_backoff`, ±`jitter`.
+
+    Doubling stops once the cap is reached, so any number of failures stays at the cap:
+
+    >>> next_delay(1.0, 100_000, 3600.0, 0.0)
+    3600.0
+    """
+    cap = max(interval, max_backoff)
+    # 2 ** failures alone overflows a float after about 1,024 failures in a row
+    doublings = min(failures, math.ceil(math.log2(cap / interval))) if interval > 0 else 0
+    delay = min(interval * 2 ** doublings, cap)
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+async def monitor(intervals: dict[str, float], store: StatusStore, stop: asyncio.Event, concurrency: int = 100,
+                  per_host_rate: float = 5.0, timeout: float = 10.0, max_backoff: float = 3600.0,
+                  jitter: float = 0.1):
+    """Check every site on its own schedule until `stop` is set.
+
+    Sites wait in a heap ordered by their next check time. First checks are spread over each
+    site's interval so thousands of sites do not all fire at start-up.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    limiter = HostRateLimiter(per_host_rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = dict.fromkeys(intervals, 0)
+    now = time.monotonic()
+    schedule = [(now + random.uniform(0, interval), url) for url, interval in intervals.items()]
+    heapq.heapify(schedule)
+    running = set()
+
+    async def run_check(url):
+        up = False
+        try:
+            result = await check_site(client, url, limiter, semaphore)
+            up = result.up
+            print(result.log_line(), flush=True)
+            store.record(result)
+        except Exception:
+            logger.exception("Checking %s failed", url)
+        finally:
+            # Always reschedule, a site must never drop out of the schedule; an error counts as a failure
+            failures[url] = 0 if up else failures[url] + 1
+            delay = next_delay(intervals[url], failures[url], max_backoff, jitter)
+            heapq.heappush(schedule, (time.monotonic() + delay, url))
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        while not stop.is_set():
+            now = time.monotonic()
+            while schedule and schedule[0][0] <= now:
+                _, url = heapq.heappop(schedule)
+                task = asyncio.create_task(run_check(url))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            wait = schedule[0][0] - now if schedule else 1.0
+            try:
+                # Wake up for the next due site, for a stop request, or every second to pick up finished checks
+                await asyncio.wait_for(stop.wait(), timeout=min(max(wait, 0.0), 1.0))
+            except asyncio.TimeoutError:
+                pass
+        # Let in-flight checks finish and be recorded
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def run_monitor(args) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    store = StatusStore(args.db)
+    try:
+        await monitor(load_intervals(args.urls, args.interval), store, stop, args.concurrency,
+                      args.per_host_rate, args.timeout, args.max_backoff, args.jitter)
+    finally:
+        store.close()
+
+
+def print_report(args) -> None:
+    store = StatusStore(args.db)
+    rows = store.report(time.time() - args.since * 3600)
+    store.close()
+    print(f"{'site':<50}{'checks':>8}{'uptime %':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        print(f"{row['url']:<50}{row['checks']:>8}{row['uptime']:>10.2f}{row['mean_ms']:>10.1f}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Monitor website availability and report uptime")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="SQLite status store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Check sites continuously until interrupted")
+    run.add_argument("--urls", type=Path, default=DEFAULT_URLS,
+                     help="Shell script with a WEBSITES=(...) array, or a file of '<url> [seconds]' lines")
+    run.add_argument("--interval", type=float, default=60.0, help="Seconds between checks of a healthy site")
+    run.add_argument("--max-backoff", type=float, default=3600.0, help="Longest delay between checks of a DOWN site")
+    run.add_argument("--jitter", type=float, default=0.1, help="Random fraction added to or taken from each delay")
+    run.add_argument("--concurrency", type=int, default=100, help="Requests in flight at once")
+    run.add_argument("--per-host-rate", type=float, default=5.0,
+                     help="Requests per second allowed to one host (0: unlimited)")
+    run.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+
+    report = commands.add_parser("report", help="Print uptime and latency percentiles per site")
+    report.add_argument("--since", type=float, default=24.0, help="Hours of history to include")
+
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.command == "run":
+        asyncio.run(run_monitor(args))
+    else:
+        print_report(args)
+
+
+if __name__ == "__main__":
+    main()
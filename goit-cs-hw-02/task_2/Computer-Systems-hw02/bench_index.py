@@ -0,0 +1,113 @@
+# Run command to compare the index page and static files before and after precompiling:
+# python bench_index.py --requests 2000
+
+
+import argparse
+import asyncio
+import re
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+
+import main
+
+BROWSER_HEADERS = {"Accept-Encoding": "gzip, deflate, br"}
+
+
+def build_legacy_app() -> FastAPI:
+    """The index page as it was served before: rendered per request, static files read from disk."""
+    app = FastAPI()
+    templates = Jinja2Templates(directory=main.TEMPLATES_DIR)
+    app.mount("/static", StaticFiles(directory=main.directory), name="static")
+
+    @app.get("/", response_class=HTMLResponse)
+    def index(request: Request):
+        return templates.TemplateResponse(
+            "index.html",
+            {"request": request, "our": "Build group WebPython #16", "static_url": lambda name: f"/static/{name}"},
+        )
+
+    return app
+
+
+def linked_assets(page: httpx.Response) -> list[str]:
+    return re.findall(r'(?:href|src)="(/static/[^"]+)"', page.text)
+
+
+async def page_load(client: httpx.AsyncClient, cache: dict | None) -> None:
+    """One page view: the HTML plus every asset it links.
+
+    With a `cache` (url -> response headers from an earlier visit) it behaves like a
+    browser revisit: immutable assets are not requested at all and everything else
+    is revalidated with If-None-Match.
+    """
+    page = await fetch(client, "/", cache)
+    urls = linked_assets(page) if page is not None else [url for url in cache if url != "/"]
+    for url in urls:
+        await fetch(client, url, cache)
+
+
+async def fetch(client: httpx.AsyncClient, url: str, cache: dict | None) -> httpx.Response | None:
+    """GETs `url` unless a cached copy is still fresh; returns the response if it has a body."""
+    headers = dict(BROWSER_HEADERS)
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None:
+        if "immutable" in cached.get("cache-control", ""):
+            return None
+        if "etag" in cached:
+            headers["If-None-Match"] = cached["etag"]
+    response = await client.get(url, headers=headers)
+    return response if response.status_code == 200 else None
+
+
+async def first_visit(client: httpx.AsyncClient) -> dict:
+    """Loads the page once and returns the response headers a browser would keep in its cache."""
+    page = await client.get("/", headers=BROWSER_HEADERS)
+    cache = {"/": page.headers}
+    for url in linked_assets(page):
+        cache[url] = (await client.get(url, headers=BROWSER_HEADERS)).headers
+    return cache
+
+
+async def measure(app: FastAPI, requests: int, revisit: bool) -> tuple[float, int, int]:
+    """Returns (page loads per second, HTTP requests made, bytes transferred) for `requests` page loads."""
+    transferred = 0
+    made = 0
+
+    async def count(response):
+        nonlocal transferred, made
+        await response.aread()
+        transferred += response.num_bytes_downloaded
+        made += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 event_hooks={"response": [count]}) as client:
+        cache = await first_visit(client)
+        transferred = made = 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            await page_load(client, cache if revisit else None)
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, made, transferred
+
+
+async def run(requests: int) -> None:
+    apps = {"before": build_legacy_app(), "after": main.app}
+    print(f"{'scenario':<22}{'page loads/sec':>16}{'requests':>10}{'bytes/page':>12}")
+    for revisit in (False, True):
+        for name, app in apps.items():
+            rate, made, transferred = await measure(app, requests, revisit)
+            scenario = f"{name} ({'revisit' if revisit else 'first visit'})"
+            print(f"{scenario:<22}{rate:>16,.1f}{made // requests:>10}{transferred // requests:>12,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the index page and static files in-process")
+    parser.add_argument("--requests", type=int, default=1000, help="Number of page loads per scenario")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path, PurePosixPath
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Fingerprinted URLs change whenever the content changes, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else may be cached but must be revalidated with If-None-Match
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Smaller bodies are not worth compressing
+MIN_COMPRESS_SIZE = 256
+# Preferred order when the client accepts several encodings
+ENCODINGS = ("br", "gzip", "identity")
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Content codings from an Accept-Encoding header that the client accepts (q > 0).
+
+    Codings the header does not name take the q of "*" if it is present; identity is
+    accepted unless it is refused by name or by "*;q=0".
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    wildcard = qualities.get("*")
+    accepted = {coding for coding, q in qualities.items() if q > 0 and coding != "*"}
+    if wildcard is not None and wildcard > 0:
+        accepted.update(coding for coding in ENCODINGS if coding not in qualities)
+    if "identity" not in qualities and (wildcard is None or wildcard > 0):
+        accepted.add("identity")
+    return accepted
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists `etag` or is "*", comparing weakly as RFC 9110 requires."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class Asset:
+    """An in-memory response body with its ETag, fingerprinted name and precompressed variants."""
+
+    def __init__(self, name: str, content: bytes, media_type: str | None = None):
+        self.name = name
+        self.digest = hashlib.sha256(content).hexdigest()[:16]
+        path = PurePosixPath(name)
+        self.fingerprinted_name = str(path.with_name(f"{path.stem}.{self.digest}{path.suffix}"))
+        self.media_type = media_type or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+        self.variants = {"identity": content}
+        if len(content) >= MIN_COMPRESS_SIZE:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                self.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(content, quality=11)
+                if len(compressed) < len(content):
+                    self.variants["br"] = compressed
+
+    def etag(self, encoding: str) -> str:
+        # Every encoded representation needs its own strong ETag
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+    def response(self, request: Request, cache_control: str) -> Response:
+        """Serve the best encoding the client accepts, or 304 if its cached copy is current."""
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        # A client that refuses every encoding we have still gets the unencoded body rather than an error
+        encoding = next((e for e in ENCODINGS if e in self.variants and e in accepted), "identity")
+        headers = {
+            "ETag": self.etag(encoding),
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        body = self.variants[encoding] if request.method != "HEAD" else b""
+        response = Response(body, media_type=self.media_type, headers=headers)
+        if request.method == "HEAD":
+            response.headers["Content-Length"] = str(len(self.variants[encoding]))
+        return response
+
+
+class AssetManifest:
+    """Loads every file under a static directory once and serves it from memory."""
+
+    def __init__(self, directory: Path, url_prefix: str = "/static"):
+        self.url_prefix = url_prefix
+        self.by_name = {}
+        self.by_fingerprint = {}
+        for path in sorted(Path(directory).rglob("*")):
+            if path.is_file():
+                name = path.relative_to(directory).as_posix()
+                asset = Asset(name, path.read_bytes())
+                self.by_name[name] = asset
+                self.by_fingerprint[asset.fingerprinted_name] = asset
+
+    def url(self, name: str) -> str:
+        """Fingerprinted URL of a static file, for use in templates."""
+        return f"{self.url_prefix}/{self.by_name[name].fingerprinted_name}"
+
+    def response(self, request: Request, path: str) -> Response:
+        asset = self.by_fingerprint.get(path)
+        if asset is not None:
+            return asset.response(request, IMMUTABLE_CACHE_CONTROL)
+        asset = self.by_name.get(path)
+        if asset is not None:
+            return asset.response(request, REVALIDATE_CACHE_CONTROL)
+        raise HTTPException(status_code=404, detail="Not Found")
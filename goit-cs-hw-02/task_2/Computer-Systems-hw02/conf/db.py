@@ -1,11 +1,69 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from conf.metrics import instrument_engine, time_checkout, time_checkout_async
+
+# Async driver used for each backend when the async URL is derived from the sync one
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """The same database as `url`, with the backend's async driver (postgresql -> asyncpg, sqlite -> aiosqlite)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for {backend!r}, set ASYNC_SQLALCHEMY_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+# e.g. SQLALCHEMY_DATABASE_URL=sqlite:///./sql_app.sqlite3 to run locally without Postgres
+SQLALCHEMY_DATABASE_URL = os.environ.get(
+    "SQLALCHEMY_DATABASE_URL", "postgresql+psycopg2://postgres:567234@db:5432/hw02"
+)
+ASYNC_SQLALCHEMY_DATABASE_URL = (
+    os.environ.get("ASYNC_SQLALCHEMY_DATABASE_URL") or async_database_url(SQLALCHEMY_DATABASE_URL)
+)
+
+# Pool settings, shared by the sync and the async engine
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+# Connections older than this (seconds) are replaced before use
+POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
 
-SQLALCHEMY_DATABASE_URL = "postgresql+psycopg2://postgres:567234@db:5432/hw02"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=True, max_overflow=5)
+def engine_options(url: str) -> dict:
+    options = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # Pooled SQLite connections are handed to FastAPI's threadpool threads
+        options["connect_args"] = {"check_same_thread": False}
+        if url.get_driver_name() == "aiosqlite":
+            # aiosqlite defaults to NullPool, which takes none of the pool settings
+            options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **engine_options(ASYNC_SQLALCHEMY_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Statement latency, slow query log and pool usage, exposed on /metrics
+instrument_engine(engine, "sync", MAX_OVERFLOW)
+instrument_engine(async_engine.sync_engine, "async", MAX_OVERFLOW)
+
 
 class Base(DeclarativeBase):
     pass
@@ -15,6 +73,16 @@ class Base(DeclarativeBase):
 def get_db():
     db = SessionLocal()
     try:
+        with time_checkout("sync"):
+            db.connection()
         yield db
     finally:
         db.close()
+
+
+# Async dependency
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        async with time_checkout_async("async"):
+            await db.connection()
+        yield db
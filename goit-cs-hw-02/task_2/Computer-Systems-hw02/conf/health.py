@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+
+class HealthCheckCache:
+    """Caches the outcome of a health check for `ttl` seconds and shares in-flight checks.
+
+    While a check is running, every other caller awaits the same task instead of
+    starting its own, so any number of simultaneous probes costs at most one
+    database round-trip per TTL window.
+    """
+
+    def __init__(self, check, ttl: float):
+        self.check = check
+        self.ttl = ttl
+        self.result = None
+        self.expires_at = 0.0
+        self.inflight = None
+
+    async def get(self):
+        if self.inflight is None and time.monotonic() < self.expires_at:
+            return self.result
+        if self.inflight is None:
+            self.inflight = asyncio.create_task(self._refresh())
+        # shield() keeps one cancelled caller from cancelling the check for everyone else
+        return await asyncio.shield(self.inflight)
+
+    async def _refresh(self):
+        try:
+            self.result = await self.check()
+            self.expires_at = time.monotonic() + self.ttl
+            return self.result
+        finally:
+            self.inflight = None
@@ -0,0 +1,340 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from sqlalchemy import event
+
+logger = logging.getLogger("sqlalchemy.slow_query")
+
+# Statements slower than this many seconds are logged together with their duration
+SLOW_QUERY_THRESHOLD = float(os.environ.get("DB_SLOW_QUERY_THRESHOLD", 0.5))
+
+# Directory where every worker process of the production server keeps a snapshot of its metrics, so that
+# /metrics can report all workers together. Read on every use because the server sets it before forking.
+MULTIPROC_DIR_ENV = "METRICS_MULTIPROC_DIR"
+# Seconds between snapshots written by each worker
+SNAPSHOT_INTERVAL = float(os.environ.get("METRICS_SNAPSHOT_INTERVAL", 1.0))
+# Snapshot holding the counters and histograms of workers that have exited
+RETIRED_SNAPSHOT = "retired.json"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(names, values):
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with one series per combination of label values."""
+
+    def __init__(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [cumulative bucket counts, sum, count]
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(label_values), list(counts), total, count]
+                    for label_values, (counts, total, count) in self.series.items()]
+
+    def absorb(self, snapshot):
+        """Add the series of another process's snapshot to this histogram."""
+        with self.lock:
+            for label_values, counts, total, count in snapshot:
+                series = self.series.setdefault(tuple(label_values), [[0] * len(self.buckets), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+    def empty_copy(self):
+        return Histogram(self.name, self.help_text, self.labels, self.buckets)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (counts, total, count) in sorted(self.series.items()):
+                labels = format_labels(self.labels, label_values)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total}")
+                lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Counter:
+    """Thread-safe Prometheus-style counter with one series per combination of label values."""
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(label_values), value] for label_values, value in self.values.items()]
+
+    def absorb(self, snapshot):
+        """Add the series of another process's snapshot to this counter."""
+        for label_values, value in snapshot:
+            self.inc(tuple(label_values), value)
+
+    def empty_copy(self):
+        return Counter(self.name, self.help_text, self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{{{format_labels(self.labels, label_values)}}} {value}")
+        return lines
+
+
+statement_duration = Histogram(
+    "db_statement_duration_seconds", "Duration of SQL statements.", ("engine", "statement")
+)
+checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool.", ("engine",)
+)
+slow_queries = Counter("db_slow_queries_total", "Statements slower than the slow query threshold.", ("engine",))
+overflow_checkouts = Counter(
+    "db_pool_overflow_checkouts_total", "Checkouts served by an overflow connection.", ("engine",)
+)
+# engine name -> (engine, configured max_overflow)
+instrumented_engines = {}
+overflow_high_watermark = {}
+
+
+def statement_kind(statement):
+    """First keyword of a statement (SELECT, INSERT, ...), used as the histogram label."""
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def instrument_engine(engine, name, max_overflow):
+    """Attach statement timing and pool usage hooks to a sync Engine (use .sync_engine for async ones)."""
+    instrumented_engines[name] = (engine, max_overflow)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        statement_duration.observe((name, statement_kind(statement)), elapsed)
+        if elapsed >= SLOW_QUERY_THRESHOLD:
+            slow_queries.inc((name,))
+            logger.warning("Slow query on %s engine (%.3f s): %s", name, elapsed, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        starts = connection.info.get("query_start_time") if connection is not None else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        overflow = pool_stat(engine.pool, "overflow")
+        if overflow is not None and overflow > 0:
+            overflow_checkouts.inc((name,))
+            overflow_high_watermark[name] = max(overflow_high_watermark.get(name, 0), overflow)
+
+
+@contextmanager
+def time_checkout(name):
+    """Time the block as a pool checkout wait for the named engine."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        checkout_wait.observe((name,), time.perf_counter() - start)
+
+
+@asynccontextmanager
+async def time_checkout_async(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        checkout_wait.observe((name,), time.perf_counter() - start)
+
+
+def pool_stat(pool, method):
+    """Call a QueuePool statistics method, or return None for pools without it (NullPool, StaticPool)."""
+    read = getattr(pool, method, None)
+    return read() if read is not None else None
+
+
+def overflow_in_use(pool):
+    # QueuePool.overflow() counts from -pool_size, so only positive values are overflow connections
+    overflow = pool_stat(pool, "overflow")
+    return max(overflow, 0) if overflow is not None else None
+
+
+POOL_GAUGES = (
+    ("db_pool_size", "Configured number of persistent connections.",
+     lambda name, pool, max_overflow: pool_stat(pool, "size")),
+    ("db_pool_checked_out", "Connections currently checked out.",
+     lambda name, pool, max_overflow: pool_stat(pool, "checkedout")),
+    ("db_pool_overflow_in_use", "Overflow connections currently open.",
+     lambda name, pool, max_overflow: overflow_in_use(pool)),
+    ("db_pool_overflow_high_watermark", "Largest number of overflow connections open at once.",
+     lambda name, pool, max_overflow: overflow_high_watermark.get(name, 0)),
+    ("db_pool_max_overflow", "Configured max_overflow.",
+     lambda name, pool, max_overflow: max_overflow),
+)
+
+
+def pool_gauge_values():
+    """{gauge name: {engine name: value}} for the pools of this process."""
+    values = {}
+    for metric, _, read in POOL_GAUGES:
+        for name, (engine, max_overflow) in sorted(instrumented_engines.items()):
+            value = read(name, engine.pool, max_overflow)
+            if value is not None:
+                values.setdefault(metric, {})[name] = value
+    return values
+
+
+def render_pool_gauges(workers):
+    """Gauge lines for [(pid, pool_gauge_values())]; pid None leaves out the pid label."""
+    lines = []
+    for metric, help_text, _ in POOL_GAUGES:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for pid, values in workers:
+            for name, value in sorted(values.get(metric, {}).items()):
+                labels = f'engine="{name}"' if pid is None else f'engine="{name}",pid="{pid}"'
+                lines.append(f"{metric}{{{labels}}} {value}")
+    return lines
+
+
+METRICS = (statement_duration, checkout_wait, slow_queries, overflow_checkouts)
+
+
+def multiproc_dir():
+    return os.environ.get(MULTIPROC_DIR_ENV)
+
+
+def write_json(path, data):
+    # Write then rename, so readers never see a half-written snapshot
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+def read_json(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot():
+    """Save this process's metrics to its file in the multiprocess directory."""
+    write_json(os.path.join(multiproc_dir(), f"{os.getpid()}.json"), {
+        "pid": os.getpid(),
+        "metrics": {metric.name: metric.snapshot() for metric in METRICS},
+        "gauges": pool_gauge_values(),
+    })
+
+
+def start_snapshot_writer():
+    """Write this worker's snapshot every SNAPSHOT_INTERVAL seconds from a daemon thread."""
+    def run():
+        while True:
+            time.sleep(SNAPSHOT_INTERVAL)
+            try:
+                write_snapshot()
+            except OSError:
+                logger.exception("Could not write the metrics snapshot")
+
+    threading.Thread(target=run, name="metrics-snapshot", daemon=True).start()
+
+
+def retire_worker(pid):
+    """Fold an exited worker's counters and histograms into the retired snapshot and drop its gauges.
+
+    Counters and histograms must never go down, so the numbers of exited workers stay in the
+    totals; their pool gauges describe connections that no longer exist.
+    """
+    directory = multiproc_dir()
+    path = os.path.join(directory, f"{pid}.json")
+    snapshot = read_json(path)
+    if snapshot is None:
+        return
+    retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+    retired = read_json(retired_path) or {"metrics": {}}
+    for metric in METRICS:
+        merged = metric.empty_copy()
+        merged.absorb(retired["metrics"].get(metric.name, []))
+        merged.absorb(snapshot["metrics"].get(metric.name, []))
+        retired["metrics"][metric.name] = merged.snapshot()
+    write_json(retired_path, retired)
+    os.remove(path)
+
+
+def render_merged_metrics(directory):
+    """Metrics of every worker: counters and histograms summed, pool gauges labelled with the worker pid."""
+    write_snapshot()
+    merged = [metric.empty_copy() for metric in METRICS]
+    workers = []
+    for entry in sorted(os.listdir(directory)):
+        if not entry.endswith(".json"):
+            continue
+        snapshot = read_json(os.path.join(directory, entry))
+        if snapshot is None:
+            continue  # Retired between listing and reading
+        for metric in merged:
+            metric.absorb(snapshot["metrics"].get(metric.name, []))
+        if "pid" in snapshot:
+            workers.append((snapshot["pid"], snapshot["gauges"]))
+    lines = []
+    for metric in merged:
+        lines.extend(metric.render())
+    lines.extend(render_pool_gauges(workers))
+    return "\n".join(lines) + "\n"
+
+
+def render_metrics():
+    """All collected metrics in the Prometheus text exposition format.
+
+    Under the production server every worker answers /metrics with the totals of all workers.
+    """
+    directory = multiproc_dir()
+    if directory:
+        return render_merged_metrics(directory)
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(render_pool_gauges([(None, pool_gauge_values())]))
+    return "\n".join(lines) + "\n"
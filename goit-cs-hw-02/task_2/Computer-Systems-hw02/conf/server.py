@@ -0,0 +1,125 @@
+import glob
+import os
+import shutil
+import sys
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.util import import_app
+
+# A worker is restarted after this many requests, plus up to the jitter so they don't all restart together
+MAX_REQUESTS = int(os.environ.get("WEB_MAX_REQUESTS", 10000))
+MAX_REQUESTS_JITTER = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 1000))
+# Seconds a worker gets to finish in-flight requests on restart or shutdown
+GRACEFUL_TIMEOUT = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+TIMEOUT = int(os.environ.get("WEB_TIMEOUT", 60))
+KEEPALIVE = int(os.environ.get("WEB_KEEPALIVE", 5))
+# Import the app once in the master and fork it into the workers
+PRELOAD = os.environ.get("WEB_PRELOAD", "0") == "1"
+
+# Metrics directory created by prepare_metrics_dir, removed again when the master exits
+_created_metrics_dir = None
+
+
+def post_fork(server, worker):
+    """Give every worker its own connection pools.
+
+    With preload the engines are created in the master, and pooled connections must
+    never be shared between processes. dispose(close=False) drops the inherited pool
+    without closing the parent's sockets, so the worker opens fresh connections.
+    """
+    db = sys.modules.get("conf.db")
+    if db is None:
+        return  # The app is imported in the worker itself, its engines are already its own
+    db.engine.dispose(close=False)
+    db.async_engine.sync_engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """Start writing this worker's metrics snapshot so every worker can serve the combined /metrics."""
+    from conf.metrics import start_snapshot_writer
+
+    start_snapshot_writer()
+
+
+def worker_exit(server, worker):
+    """Save the final counts of a worker that is shutting down, including those since the last snapshot."""
+    from conf.metrics import write_snapshot
+
+    write_snapshot()
+
+
+def child_exit(server, worker):
+    """Runs in the master once a worker has exited, however it exited."""
+    from conf.metrics import retire_worker
+
+    retire_worker(worker.pid)
+
+
+def on_exit(server):
+    """Remove the temporary metrics directory when the master shuts down."""
+    if _created_metrics_dir is not None:
+        shutil.rmtree(_created_metrics_dir, ignore_errors=True)
+
+
+def prepare_metrics_dir():
+    """Point METRICS_MULTIPROC_DIR at an empty directory before the workers are forked.
+
+    A directory given in the environment is emptied of the previous run's snapshots; otherwise
+    a temporary one is created, and on_exit removes it.
+    """
+    global _created_metrics_dir
+    from conf.metrics import MULTIPROC_DIR_ENV
+
+    directory = os.environ.get(MULTIPROC_DIR_ENV)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            os.remove(path)
+    else:
+        _created_metrics_dir = tempfile.mkdtemp(prefix="hw02-metrics-")
+        os.environ[MULTIPROC_DIR_ENV] = _created_metrics_dir
+
+
+class ProductionServer(BaseApplication):
+    """Gunicorn master running uvicorn workers that share one listening socket."""
+
+    def __init__(self, app_uri: str, options: dict):
+        self.app_uri = app_uri
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return import_app(self.app_uri)
+
+
+def run_production(app_uri: str, host: str, port: int, workers: int):
+    """Serve `app_uri` with `workers` processes until the master receives SIGTERM or SIGINT.
+
+    SIGHUP starts a complete set of new workers and then gracefully stops the old ones,
+    which finish their in-flight requests first. Every worker's /metrics reports the
+    combined metrics of all workers, see conf.metrics.render_merged_metrics.
+    """
+    prepare_metrics_dir()
+    ProductionServer(app_uri, {
+        "bind": f"{host}:{port}",
+        "workers": max(workers, 1),
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "max_requests": MAX_REQUESTS,
+        "max_requests_jitter": MAX_REQUESTS_JITTER,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "timeout": TIMEOUT,
+        "keepalive": KEEPALIVE,
+        "preload_app": PRELOAD,
+        "post_fork": post_fork,
+        "post_worker_init": post_worker_init,
+        "worker_exit": worker_exit,
+        "child_exit": child_exit,
+        "on_exit": on_exit,
+        "accesslog": "-",
+        "loglevel": "info",
+    }).run()
@@ -0,0 +1,109 @@
+# Start the app against the bundled SQLite database:
+#   SQLALCHEMY_DATABASE_URL=sqlite:///./sql_app.sqlite3 python main.py --prod
+# Run command to load it: python loadtest.py --concurrency 50 --duration 10
+# Only some endpoints: python loadtest.py --endpoints / /healthchecker
+
+
+import argparse
+import asyncio
+import math
+import re
+import time
+from collections import Counter
+
+import httpx
+
+DEFAULT_ENDPOINTS = ("/", "/healthchecker", "/static/*")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+async def resolve_endpoints(client: httpx.AsyncClient, endpoints: list[str]) -> list[str]:
+    """Expands '/static/*' into the asset URLs linked from the index page."""
+    paths = []
+    for endpoint in endpoints:
+        if endpoint != "/static/*":
+            paths.append(endpoint)
+            continue
+        page = await client.get("/")
+        page.raise_for_status()
+        paths.extend(re.findall(r'(?:href|src)="(/static/[^"]+)"', page.text))
+    return paths
+
+
+class Stats:
+    """Latencies and status codes per endpoint."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+
+    def record(self, path: str, latency: float, status: int | str):
+        self.latencies.setdefault(path, []).append(latency)
+        self.statuses.setdefault(path, Counter())[status] += 1
+
+
+async def worker(client: httpx.AsyncClient, paths: list[str], offset: int, deadline: float,
+                 remaining: list[int], stats: Stats):
+    """Requests `paths` round-robin until the deadline passes or the request budget runs out."""
+    i = offset
+    while time.perf_counter() < deadline and remaining[0] != 0:
+        remaining[0] -= 1
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        stats.record(path, time.perf_counter() - start, status)
+
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Accept-Encoding": "gzip, br"}
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout, headers=headers) as client:
+        paths = await resolve_endpoints(client, args.endpoints)
+        stats = Stats()
+        # -1 means no request budget, only the duration applies
+        remaining = [args.requests or -1]
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            worker(client, paths, i, deadline, remaining, stats) for i in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    print(f"\n{args.url}, concurrency {args.concurrency}, {elapsed:.1f} s")
+    print(f"{'endpoint':<40}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    rows = [(path, sorted(latencies), stats.statuses[path]) for path, latencies in stats.latencies.items()]
+    rows.append(("total", sorted(l for _, latencies, _ in rows for l in latencies),
+                 sum(stats.statuses.values(), Counter())))
+    for path, latencies, statuses in rows:
+        print(f"{path:<40}{len(latencies):>10}{len(latencies) / elapsed:>10,.1f}"
+              f"{percentile(latencies, 0.50) * 1e3:>10.2f}{percentile(latencies, 0.95) * 1e3:>10.2f}"
+              f"{percentile(latencies, 0.99) * 1e3:>10.2f}  "
+              + " ".join(f"{status}x{count}" for status, count in sorted(statuses.items(), key=str)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the hw02 FastAPI endpoints")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running app")
+    parser.add_argument("--endpoints", nargs="+", default=list(DEFAULT_ENDPOINTS),
+                        help="Paths to request round-robin, '/static/*' means every asset on the index page")
+    parser.add_argument("--concurrency", type=int, default=20, help="Number of requests in flight at once")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run for")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0: no limit)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
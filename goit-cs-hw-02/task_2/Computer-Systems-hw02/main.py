@@ -1,46 +1,106 @@
+import argparse
+import functools
 import os
 from pathlib import Path
 
 import uvicorn
-from fastapi import FastAPI, Depends, HTTPException, Request, status
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from sqlalchemy import text
-from sqlalchemy.orm import Session
 
-from conf.db import get_db
+from conf.db import AsyncSessionLocal
+from conf.health import HealthCheckCache
+from conf.metrics import render_metrics, time_checkout_async
 
 app = FastAPI()
 
 BASE_DIR = Path(__file__).parent
 directory = BASE_DIR.joinpath("static")
-app.mount("/static", StaticFiles(directory=directory), name="static")
-templates = Jinja2Templates(directory=BASE_DIR / "templates")
+TEMPLATES_DIR = BASE_DIR / "templates"
 
 
-@app.get("/", response_class=HTMLResponse)
-def index(request: Request):
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "our": "Build group WebPython #16"}
+@functools.cache
+def site():
+    """Static assets and the prerendered index page, built on first use.
+
+    Jinja2 and the static files are only loaded when a page is first requested,
+    so workers (and the /healthchecker and /metrics endpoints) start without them.
+    """
+    from fastapi.templating import Jinja2Templates
+
+    from conf.assets import Asset, AssetManifest
+
+    assets = AssetManifest(directory)
+    templates = Jinja2Templates(directory=TEMPLATES_DIR)
+    # The index context never changes, so the page is rendered (and compressed) once
+    index_page = Asset(
+        "index.html",
+        templates.get_template("index.html").render(our="Build group WebPython #16", static_url=assets.url).encode(),
+        media_type="text/html",
     )
+    return assets, index_page
 
 
-@app.get("/healthchecker")
-def healthchecker(db: Session = Depends(get_db)):
+@app.get("/", response_class=HTMLResponse)
+async def index(request: Request):
+    from conf.assets import REVALIDATE_CACHE_CONTROL
+
+    _, index_page = site()
+    return index_page.response(request, REVALIDATE_CACHE_CONTROL)
+
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], name="static")
+async def static(request: Request, path: str):
+    assets, _ = site()
+    return assets.response(request, path)
+
+
+async def check_database():
+    """Run `SELECT 1` and return None if the database is healthy, otherwise an error detail."""
     try:
-        # Make request
-        result = db.execute(text("SELECT 1"))
-        result = result.fetchone()
-        if result is None:
-            raise HTTPException(
-                status_code=500, detail="Database is not configured correctly"
-            )
-        return {"message": "Welcome to FastAPI!"}
+        async with AsyncSessionLocal() as db:
+            async with time_checkout_async("async"):
+                await db.connection()
+            # Make request
+            result = await db.execute(text("SELECT 1"))
+            if result.fetchone() is None:
+                return "Database is not configured correctly"
+        return None
     except Exception as e:
         print(e)
-        raise HTTPException(status_code=500, detail="Error connecting to the database")
+        return "Error connecting to the database"
+
+
+# Seconds a health check result is reused by concurrent and subsequent probes
+HEALTHCHECK_CACHE_TTL = float(os.environ.get("HEALTHCHECK_CACHE_TTL", 2.0))
+health_cache = HealthCheckCache(check_database, ttl=HEALTHCHECK_CACHE_TTL)
+
+
+@app.get("/healthchecker")
+async def healthchecker():
+    error = await health_cache.get()
+    if error is not None:
+        raise HTTPException(status_code=500, detail=error)
+    return {"message": "Welcome to FastAPI!"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=int(os.environ.get("PORT", 8000)), log_level="info", reload=True)
+    parser = argparse.ArgumentParser(description="Run the FastAPI app")
+    parser.add_argument("--prod", action="store_true",
+                        help="Run several gunicorn/uvicorn worker processes instead of the reloading dev server")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="Number of worker processes in --prod mode (default: CPU count)")
+    args = parser.parse_args()
+    port = int(os.environ.get("PORT", 8000))
+
+    if args.prod:
+        from conf.server import run_production
+
+        run_production("main:app", host="0.0.0.0", port=port, workers=args.workers)
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=port, log_level="info", reload=True)
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+
+# ============================== Configuration ==============================
+BASE_DIR = Path(__file__).parent
+QUERIES_FILE = BASE_DIR / "queries.sql"
+INIT_FILE = BASE_DIR / "init.sql"
+
+# Proposed indexes: btree on the foreign keys that queries filter and join on,
+# trigram for the email LIKE '%...' patterns that a btree cannot serve
+POSTGRES_INDEXES = {
+    "tasks_user_id_idx": "CREATE INDEX tasks_user_id_idx ON tasks (user_id);",
+    "tasks_status_id_idx": "CREATE INDEX tasks_status_id_idx ON tasks (status_id);",
+    "users_email_trgm_idx": "CREATE INDEX users_email_trgm_idx ON users USING gin (email gin_trgm_ops);",
+}
+# SQLite has no trigram index for LIKE, only the foreign key indexes apply
+SQLITE_INDEXES = {
+    "tasks_user_id_idx": "CREATE INDEX tasks_user_id_idx ON tasks (user_id);",
+    "tasks_status_id_idx": "CREATE INDEX tasks_status_id_idx ON tasks (status_id);",
+}
+
+SQLITE_SCHEMA = """
+DROP TABLE IF EXISTS tasks;
+DROP TABLE IF EXISTS users;
+DROP TABLE IF EXISTS status;
+
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY,
+    fullname VARCHAR(100),
+    email VARCHAR(100) UNIQUE
+);
+
+CREATE TABLE status (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(50) UNIQUE NOT NULL
+);
+
+CREATE TABLE tasks (
+    id INTEGER PRIMARY KEY,
+    title VARCHAR(100),
+    description TEXT,
+    status_id INTEGER REFERENCES status (id) ON DELETE CASCADE,
+    user_id INTEGER REFERENCES users (id) ON DELETE CASCADE
+);
+
+INSERT INTO status (name) VALUES ('new'), ('in progress'), ('completed');
+"""
+
+# ============================== Synthetic data ==============================
+FIRST_NAMES = ("John", "Mary", "Olena", "Taras", "Anna", "Petro", "Iryna", "David", "Sofia", "Max")
+LAST_NAMES = ("Smith", "Shevchenko", "Brown", "Kovalenko", "Miller", "Bondarenko", "Wilson", "Tkachenko")
+DOMAINS = ("example.com", "example.net", "example.org", "gmail.com", "ukr.net")
+WORDS = ("review", "fix", "deploy", "write", "test", "report", "plan", "update", "design", "call", "client", "docs")
+
+
+def synthetic_users(count, rng):
+    """(id, fullname, email) rows without Faker; emails are unique because they contain the id."""
+    for user_id in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield user_id, f"{first} {last}", f"{first.lower()}.{last.lower()}{user_id}@{rng.choice(DOMAINS)}"
+
+
+def synthetic_tasks(count, num_users, rng):
+    """(title, description, status_id, user_id) rows; about 5% have no description."""
+    for _ in range(count):
+        title = " ".join(rng.choices(WORDS, k=5)).capitalize()
+        description = None if rng.random() < 0.05 else " ".join(rng.choices(WORDS, k=20)).capitalize() + "."
+        yield title, description, rng.randint(1, 3), rng.randint(1, num_users)
+
+
+# ============================== Queries =====================================
+def load_queries(path=QUERIES_FILE):
+    """Splits queries.sql into (description, statement) pairs, using the comment above each statement."""
+    queries = []
+    description, statement = "", []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not statement and stripped.startswith("--"):
+            description = stripped.lstrip("-").strip()
+        elif stripped:
+            statement.append(line)
+            if stripped.endswith(";"):
+                queries.append((description, "\n".join(statement).rstrip(";")))
+                description, statement = "", []
+    return queries
+
+
+# ============================== Backends ====================================
+class PostgresBackend:
+    """Runs the queries with EXPLAIN (ANALYZE, BUFFERS); every statement is rolled back."""
+
+    name = "postgres"
+
+    def __init__(self):
+        import psycopg2
+
+        self.indexes = dict(POSTGRES_INDEXES)
+        self.conn = psycopg2.connect(
+            dbname=os.environ.get("DB_NAME", "hw03_db"),
+            user=os.environ.get("DB_USER", "user"),
+            password=os.environ.get("DB_PASSWORD", "password"),
+            host=os.environ.get("DB_HOST", "localhost"),
+            port=int(os.environ.get("DB_PORT", 5432)),
+        )
+
+    def seed(self, num_users, num_tasks):
+        """Recreates the schema from init.sql and fills it using seed.py's COPY mode."""
+        import seed
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(INIT_FILE.read_text(encoding="utf-8"))
+        self.conn.commit()
+        seed.seed_bulk(num_users, num_tasks, "copy", workers=os.cpu_count() or 1, seed=0)
+        self.analyze()
+
+    def analyze(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("ANALYZE users; ANALYZE tasks; ANALYZE status;")
+        self.conn.commit()
+
+    def run(self, statement):
+        """Executes one statement and rolls it back, so DML leaves the data unchanged."""
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(statement)
+                return cursor.fetchall()
+        finally:
+            self.conn.rollback()
+
+    def explain(self, statement):
+        """Returns (execution ms, shared buffers touched) for one rolled-back run."""
+        result = self.run(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}")[0][0]
+        if isinstance(result, str):
+            result = json.loads(result)
+        plan = result[0]
+        buffers = plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0)
+        return plan["Execution Time"], buffers
+
+    def plan(self, statement):
+        return "\n".join(row[0] for row in self.run(f"EXPLAIN (ANALYZE, BUFFERS) {statement}"))
+
+    def apply_indexes(self):
+        import psycopg2
+
+        with self.conn.cursor() as cursor:
+            try:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+                self.conn.commit()
+            except psycopg2.Error as e:
+                # pg_trgm ships with contrib, which some builds leave out
+                self.conn.rollback()
+                print(f"Skipping users_email_trgm_idx, pg_trgm is not available: {e.pgerror or e}".strip())
+                del self.indexes["users_email_trgm_idx"]
+            for name, ddl in self.indexes.items():
+                cursor.execute(f"DROP INDEX IF EXISTS {name};")
+                cursor.execute(ddl)
+        self.conn.commit()
+        self.analyze()
+
+    def drop_indexes(self):
+        with self.conn.cursor() as cursor:
+            for name in self.indexes:
+                cursor.execute(f"DROP INDEX IF EXISTS {name};")
+        self.conn.commit()
+        self.analyze()
+
+
+class SQLiteBackend:
+    """Runs the queries in SQLite with synthetic data; plans come from EXPLAIN QUERY PLAN."""
+
+    name = "sqlite"
+    indexes = SQLITE_INDEXES
+
+    def __init__(self, path=":memory:"):
+        # Transactions are managed explicitly so every statement can be rolled back
+        self.conn = sqlite3.connect(path, isolation_level=None)
+
+    def seed(self, num_users, num_tasks):
+        rng = random.Random(0)
+        self.conn.executescript(SQLITE_SCHEMA)
+        self.conn.execute("BEGIN")
+        self.conn.executemany("INSERT INTO users (id, fullname, email) VALUES (?, ?, ?)",
+                              synthetic_users(num_users, rng))
+        self.conn.executemany("INSERT INTO tasks (title, description, status_id, user_id) VALUES (?, ?, ?, ?)",
+                              synthetic_tasks(num_tasks, num_users, rng))
+        self.conn.execute("COMMIT")
+        self.analyze()
+
+    def analyze(self):
+        self.conn.execute("ANALYZE")
+
+    def explain(self, statement):
+        """Returns (execution ms, None) for one rolled-back run; SQLite does not report buffers."""
+        self.conn.execute("BEGIN")
+        try:
+            start = time.perf_counter()
+            self.conn.execute(statement).fetchall()
+            elapsed = (time.perf_counter() - start) * 1e3
+        finally:
+            self.conn.execute("ROLLBACK")
+        return elapsed, None
+
+    def plan(self, statement):
+        plan_rows = self.conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+        return "\n".join(f"{'  ' * depth(plan_rows, row)}{row[3]}" for row in plan_rows)
+
+    def apply_indexes(self):
+        self.drop_indexes()
+        for ddl in self.indexes.values():
+            self.conn.execute(ddl)
+        self.analyze()
+
+    def drop_indexes(self):
+        for name in self.indexes:
+            self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+        self.analyze()
+
+
+def depth(plan_rows, row):
+    """Nesting level of an EXPLAIN QUERY PLAN row, found through its parent ids."""
+    parents = {r[0]: r[1] for r in plan_rows}
+    level, parent = 0, row[1]
+    while parent in parents:
+        level, parent = level + 1, parents[parent]
+    return level
+
+
+# ============================== Main Logic ==================================
+def measure(backend, queries, repeat):
+    """Median execution time, buffers and plan of every query on the current indexes."""
+    results = []
+    for _, statement in queries:
+        runs = [backend.explain(statement) for _ in range(repeat)]
+        results.append((statistics.median(run[0] for run in runs), runs[-1][1], backend.plan(statement)))
+    return results
+
+
+def print_report(queries, before, after, show_plans):
+    print(f"\n{'#':>3}  {'query':<52}{'before ms':>11}{'after ms':>11}{'speedup':>9}{'buffers':>17}")
+    for number, ((description, _), old, new) in enumerate(zip(queries, before, after), start=1):
+        buffers = f"{old[1]} -> {new[1]}" if old[1] is not None else "-"
+        speedup = old[0] / new[0] if new[0] > 0 else float("inf")
+        print(f"{number:>3}  {description[:50]:<52}{old[0]:>11.3f}{new[0]:>11.3f}{speedup:>8.1f}x{buffers:>17}")
+
+    if show_plans:
+        for number, ((description, statement), old, new) in enumerate(zip(queries, before, after), start=1):
+            print(f"\n{'=' * 30} {number}. {description}\n{statement}")
+            print(f"\n--- before\n{old[2]}\n--- after\n{new[2]}")
+
+
+def print_hints(queries):
+    for number, (_, statement) in enumerate(queries, start=1):
+        if re.search(r"NOT\s+IN\s*\(\s*SELECT", statement, re.IGNORECASE):
+            print(f"Hint for query {number}: NOT IN (SELECT ...) cannot use an anti-join and returns no rows "
+                  f"if the subquery yields NULL; NOT EXISTS can use tasks_user_id_idx.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark queries.sql before and after the proposed indexes")
+    parser.add_argument("--backend", choices=("postgres", "sqlite"), default="postgres")
+    parser.add_argument("--sqlite-path", default=":memory:", help="Database file for the sqlite backend")
+    parser.add_argument("--users", type=int, default=0,
+                        help="Reseed with this many users first (required for an empty sqlite database)")
+    parser.add_argument("--tasks", type=int, default=0, help="Number of tasks when reseeding")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query, the median time is reported")
+    parser.add_argument("--plans", action="store_true", help="Print the before and after plan of every query")
+    parser.add_argument("--keep", action="store_true", help="Keep the proposed indexes instead of dropping them")
+    args = parser.parse_args()
+
+    if args.backend == "postgres":
+        backend = PostgresBackend()
+    else:
+        backend = SQLiteBackend(args.sqlite_path)
+    if args.users:
+        start = time.perf_counter()
+        backend.seed(args.users, args.tasks or 3 * args.users)
+        print(f"Seeded {args.users} users in {time.perf_counter() - start:.1f} s")
+
+    queries = load_queries()
+    backend.drop_indexes()
+    before = measure(backend, queries, args.repeat)
+    backend.apply_indexes()
+    after = measure(backend, queries, args.repeat)
+    if not args.keep:
+        backend.drop_indexes()
+
+    print(f"Backend: {backend.name}, proposed indexes:")
+    for ddl in backend.indexes.values():
+        print(f"  {ddl}")
+    print_report(queries, before, after, args.plans)
+    print_hints(queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
+DROP TABLE IF EXISTS tasks;
 DROP TABLE IF EXISTS users;
 DROP TABLE IF EXISTS status;
-DROP TABLE IF EXISTS tasks;
 
 CREATE TABLE users (
     id SERIAL PRIMARY KEY,
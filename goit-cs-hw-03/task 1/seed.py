@@ -1,44 +1,166 @@
+import argparse
+import io
+import os
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import psycopg2
-from random import randint
+from psycopg2.extras import execute_values
 from faker import Faker
 
 # ============================== Configuration ==============================
-DB_NAME = "hw03_db"
-DB_USER = "user"
-DB_PASSWORD = "password"
-DB_HOST = "localhost"
-DB_PORT = 5432
+DB_NAME = os.environ.get("DB_NAME", "hw03_db")
+DB_USER = os.environ.get("DB_USER", "user")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "password")
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_PORT = int(os.environ.get("DB_PORT", 5432))
 
 # ============================== Initialization ==============================
 fake = Faker()
 NUM_USERS = 10
 NUM_TASKS = 30
+# Rows generated, sent and held in memory at a time by the bulk modes
+BATCH_SIZE = 10_000
+
+
+# ============================== Helpers =====================================
+def connect():
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT
+    )
+
+
+def unique_email(index, faker=fake):
+    """Fake email that is unique by construction, because the user index is part of it.
+
+    Unlike fake.unique.email() this keeps no set of issued values, so it stays
+    fast and never runs out of candidates at millions of users. It also means
+    processes generating disjoint index ranges can never produce the same email.
+    """
+    return f"{faker.user_name()}.{index}@{faker.free_email_domain()}"
+
+
+def fake_user(index, faker=fake):
+    return faker.name(), unique_email(index, faker)
+
+
+def fake_task(user_ids, faker=fake):
+    return (faker.sentence(nb_words=5), faker.paragraph(nb_sentences=2),
+            faker.random.randint(1, 3), faker.random.choice(user_ids))
+
+
+def generate_batch(kind, first_index, size, num_users, seed):
+    """Generates one batch of rows; runs in the generator processes.
+
+    Users are (fullname, email) for indexes first_index.. first_index + size - 1.
+    Tasks reference their user by index (0 .. num_users - 1); the writer maps
+    indexes to the ids it reserved, so generators never need to talk to the
+    database. Each batch has its own seeded Faker, which keeps runs reproducible
+    and stops forked processes from repeating each other's random streams.
+    """
+    faker = Faker()
+    faker.seed_instance(f"{seed}-{kind}-{first_index}")
+    if kind == "users":
+        return [fake_user(index, faker) for index in range(first_index, first_index + size)]
+    user_indexes = range(num_users)
+    return [fake_task(user_indexes, faker) for _ in range(size)]
+
+
+def batch_jobs(num_users, num_tasks, batch_size):
+    """(kind, first_index, size) for every batch, all users before any task."""
+    for kind, total in (("users", num_users), ("tasks", num_tasks)):
+        for first_index in range(0, total, batch_size):
+            yield kind, first_index, min(batch_size, total - first_index)
+
+
+def generate_inline(jobs, num_users, seed):
+    for kind, first_index, size in jobs:
+        yield kind, generate_batch(kind, first_index, size, num_users, seed)
+
+
+def generate_parallel(jobs, num_users, seed, workers):
+    """Generates batches in `workers` processes and yields them in order.
+
+    At most 2 * workers batches are pending at once, so generation runs ahead
+    of the writer without the results piling up in memory.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for kind, first_index, size in jobs:
+            pending.append((kind, pool.submit(generate_batch, kind, first_index, size, num_users, seed)))
+            if len(pending) >= 2 * workers:
+                kind, future = pending.popleft()
+                yield kind, future.result()
+        while pending:
+            kind, future = pending.popleft()
+            yield kind, future.result()
+
+
+# ============================== Bulk writers ================================
+def copy_value(value):
+    """Formats a value for COPY's text format."""
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Loads rows with COPY FROM STDIN, the fastest way into PostgreSQL."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def insert_values(cursor, table, columns, rows):
+    """Loads rows with multi-row INSERT ... VALUES statements."""
+    execute_values(
+        cursor, f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s", rows, page_size=len(rows)
+    )
+
+
+BULK_WRITERS = {"copy": copy_rows, "values": insert_values}
+
+
+def reserve_user_ids(cursor, count):
+    """Takes `count` ids from the users sequence in one round-trip."""
+    cursor.execute("SELECT nextval('users_id_seq') FROM generate_series(1, %s);", (count,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def report(label, rows, elapsed):
+    print(f"{label:<8} {rows:>10,} rows in {elapsed:8.2f} s  {rows / max(elapsed, 1e-9):>12,.0f} rows/sec")
 
 
 # ============================== Main Logic ==================================
-def seed():
-    """Populate the PostgreSQL database with fake users and tasks.
+def seed_rows(num_users=NUM_USERS, num_tasks=NUM_TASKS):
+    """Populate the PostgreSQL database with fake users and tasks, one row at a time.
 
     Generates random users and inserts them into the 'users' table,
     then creates tasks with random titles and descriptions, assigning
     them to the created users and linking to random statuses (1 to 3).
+    Every row is its own statement and commit, kept as the baseline for
+    the bulk modes.
     """
     try:
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
-        )
+        conn = connect()
         conn.autocommit = True
         cursor = conn.cursor()
 
         # Insert users
+        start = time.perf_counter()
         user_ids = []
-        for _ in range(NUM_USERS):
-            full_name = fake.name()
-            email = fake.unique.email()
+        for index in range(num_users):
+            full_name, email = fake_user(index)
             cursor.execute(
                 """
                 INSERT INTO users (fullname, email)
@@ -49,20 +171,19 @@ def seed():
             )
             user_id = cursor.fetchone()[0]
             user_ids.append(user_id)
+        report("users", num_users, time.perf_counter() - start)
 
         # Insert tasks
-        for _ in range(NUM_TASKS):
-            title = fake.sentence(nb_words=5)
-            description = fake.paragraph(nb_sentences=2)
-            status_id = randint(1, 3)
-            user_id = fake.random_element(user_ids)
+        start = time.perf_counter()
+        for _ in range(num_tasks):
             cursor.execute(
                 """
                 INSERT INTO tasks (title, description, status_id, user_id)
                 VALUES (%s, %s, %s, %s);
                 """,
-                (title, description, status_id, user_id)
+                fake_task(user_ids)
             )
+        report("tasks", num_tasks, time.perf_counter() - start)
 
         print("Seeding completed successfully.")
         cursor.close()
@@ -72,5 +193,83 @@ def seed():
         print(f"Error during seeding: {e}")
 
 
+def seed_bulk(num_users=NUM_USERS, num_tasks=NUM_TASKS, mode="copy", batch_size=BATCH_SIZE, workers=0,
+              seed=None):
+    """Populate the database in batches inside a single transaction.
+
+    Rows are generated batch by batch, so memory use depends on `batch_size`
+    and not on the row counts. User ids are reserved from the sequence in
+    bulk and written explicitly, so tasks can reference them without
+    RETURNING. Nothing is visible to other sessions until the final commit.
+
+    With `workers` > 0 the Faker calls run in that many processes while this
+    one only writes, so generation and database I/O overlap.
+    """
+    write = BULK_WRITERS[mode]
+    if seed is None:
+        seed = time.time_ns()
+    jobs = batch_jobs(num_users, num_tasks, batch_size)
+    if workers > 0:
+        batches = generate_parallel(jobs, num_users, seed, workers)
+    else:
+        batches = generate_inline(jobs, num_users, seed)
+    try:
+        conn = connect()
+        try:
+            with conn.cursor() as cursor:
+                start = time.perf_counter()
+                # User index -> id, kept compact for millions of users
+                user_ids = array("q")
+                for kind, rows in batches:
+                    if kind == "users":
+                        ids = reserve_user_ids(cursor, len(rows))
+                        write(cursor, "users", ("id", "fullname", "email"),
+                              [(user_id, *row) for user_id, row in zip(ids, rows)])
+                        user_ids.extend(ids)
+                        if len(user_ids) == num_users:
+                            report("users", num_users, time.perf_counter() - start)
+                            start = time.perf_counter()
+                    else:
+                        write(cursor, "tasks", ("title", "description", "status_id", "user_id"),
+                              [(title, description, status_id, user_ids[index])
+                               for title, description, status_id, index in rows])
+                report("tasks", num_tasks, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            conn.commit()
+            print(f"{'commit':<8} {'':>10}      in {time.perf_counter() - start:8.2f} s")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        print("Seeding completed successfully.")
+
+    except Exception as e:
+        print(f"Error during seeding: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Populate the database with fake users and tasks")
+    parser.add_argument("--users", type=int, default=NUM_USERS, help="Number of users to create")
+    parser.add_argument("--tasks", type=int, default=NUM_TASKS, help="Number of tasks to create")
+    parser.add_argument("--mode", choices=("row", *BULK_WRITERS), default="copy",
+                        help="row: one INSERT and commit per row, copy: COPY FROM STDIN, "
+                             "values: batched INSERT ... VALUES")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per batch in the bulk modes")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Processes generating rows in the bulk modes (0: generate in the writer)")
+    parser.add_argument("--seed", type=int, help="Random seed, the same seed gives the same rows")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.mode == "row":
+        seed_rows(args.users, args.tasks)
+    else:
+        seed_bulk(args.users, args.tasks, args.mode, args.batch_size, args.workers, args.seed)
+    report("total", args.users + args.tasks, time.perf_counter() - start)
+
+
 if __name__ == "__main__":
-    seed()
+    main()
@@ -0,0 +1,122 @@
+# Run command to compare the per-keyword search with the matcher: python benchmark.py --size 2 --keywords 8 100 1000 10000
+# Same with half of the keywords occurring in the text: python benchmark.py --present 5000
+# Force one matcher engine: python benchmark.py --engine python
+# Peak memory of a whole-file read against the chunked file search: python benchmark.py --memory 20 40
+
+
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+
+from keyword_matcher import ENGINES, KeywordMatcher, search_keywords_in_file
+
+
+def random_words(count: int, rng: random.Random, lengths: tuple[int, int] = (3, 10)) -> list[str]:
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(*lengths))) for _ in range(count)]
+
+
+def generate_text(size: int, vocabulary: list[str], rng: random.Random) -> str:
+    """About `size` characters of space-separated words drawn from `vocabulary`."""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(vocabulary)
+        words.append(word.capitalize() if rng.random() < 0.1 else word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def per_keyword_search(text: str, keywords: list[str]) -> set[str]:
+    """The search the threaded and multiprocessed modules used to run: one `in` scan per keyword."""
+    content = text.lower()
+    return {keyword for keyword in keywords if keyword.lower() in content}
+
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def peak_memory(func) -> tuple[int, object]:
+    """Peak bytes allocated by Python while running `func`."""
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+
+def whole_file_search(filepath: str, keywords: list[str]) -> set[str]:
+    """The file search the threaded and multiprocessed modules used to run."""
+    with open(filepath, 'r', encoding='utf-8') as file:
+        return per_keyword_search(file.read(), keywords)
+
+
+def run_memory(args) -> None:
+    rng = random.Random(args.seed)
+    vocabulary = random_words(args.vocabulary, rng)
+    keywords = rng.sample(vocabulary, 8)
+    matcher = KeywordMatcher(keywords)
+    print(f"{'file MB':>10}{'whole-file peak MB':>20}{'chunked peak MB':>18}")
+    for size in args.memory:
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+            # Written in pieces so the benchmark itself never holds the whole file
+            for _ in range(int(size)):
+                file.write(generate_text(1_000_000, vocabulary, rng) + "\n")
+        try:
+            whole, expected = peak_memory(lambda: whole_file_search(file.name, keywords))
+            chunked, found = peak_memory(lambda: search_keywords_in_file(file.name, matcher))
+            if set(found) != expected:
+                raise AssertionError("Chunked search found different keywords than the whole-file search")
+            print(f"{size:>10}{whole / 1e6:>20.1f}{chunked / 1e6:>18.1f}")
+        finally:
+            os.remove(file.name)
+
+
+def run(args) -> None:
+    rng = random.Random(args.seed)
+    vocabulary = random_words(args.vocabulary, rng)
+    text = generate_text(int(args.size * 1e6), vocabulary, rng)
+    mb = len(text) / 1e6
+
+    print(f"{mb:.1f} MB of text, vocabulary of {len(vocabulary)} words, up to {args.present} keywords present")
+    print(f"{'keywords':>10}{'engine':>13}{'matches':>10}{'build s':>10}{'per-keyword MB/s':>18}"
+          f"{'matcher MB/s':>14}{'counts MB/s':>14}")
+    for count in args.keywords:
+        # Up to --present keywords occur in the text; the rest are long random words that never do,
+        # so the number of matches stays the same as the keyword list grows and presence search
+        # cannot stop early
+        present = min(args.present, count, len(vocabulary))
+        keywords = rng.sample(vocabulary, present) + random_words(count - present, rng, (12, 16))
+        build, matcher = timed(lambda: KeywordMatcher(keywords, engine=args.engine))
+        naive, expected = timed(lambda: per_keyword_search(text, keywords))
+        scanning, found = timed(lambda: matcher.scan(text))
+        counting, counts = timed(lambda: matcher.scan(text, "counts"))
+        if found != expected:
+            raise AssertionError(f"Matcher found {len(found)} keywords, per-keyword search {len(expected)}")
+        print(f"{count:>10}{matcher.engine:>13}{sum(counts.values()):>10}{build:>10.3f}{mb / naive:>18.1f}"
+              f"{mb / scanning:>14.1f}{mb / counting:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark keyword search over synthetic text")
+    parser.add_argument("--size", type=float, default=2.0, help="Text size in MB")
+    parser.add_argument("--keywords", type=int, nargs="+", default=[8, 100, 1000, 10000],
+                        help="Keyword list sizes to measure")
+    parser.add_argument("--present", type=int, default=8, help="Keywords of each list that occur in the text")
+    parser.add_argument("--engine", choices=ENGINES, help="Matcher engine, picked from the keyword count by default")
+    parser.add_argument("--vocabulary", type=int, default=20000, help="Distinct words in the text")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--memory", type=int, nargs="+",
+                        help="Instead, compare peak memory of searching files of these sizes in MB")
+    args = parser.parse_args()
+    if args.memory:
+        run_memory(args)
+    else:
+        run(args)
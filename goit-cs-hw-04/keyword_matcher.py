@@ -0,0 +1,282 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional (see requirements.txt), the pure-Python automaton is always available
+    ahocorasick = None
+
+REPORTS = ("presence", "counts", "offsets")
+ENGINES = ("per-keyword", "ahocorasick", "python")
+# Up to this many keywords, one str.find scan per keyword (in C) beats a single automaton pass;
+# the pure-Python automaton is slow enough to move the break-even point much higher
+PER_KEYWORD_LIMIT = 32 if ahocorasick else 256
+# Characters decoded and scanned at a time when searching a file
+CHUNK_SIZE = 1 << 20
+
+
+def is_word_char(char: str) -> bool:
+    """Whether `char` can be part of a word, matching the \\w class of the re module."""
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """Finds every occurrence of a list of keywords, ignoring case.
+
+    The scanning runs in C wherever it can. A few keywords are each searched with str.find,
+    one fast scan per keyword. Past PER_KEYWORD_LIMIT keywords a single Aho-Corasick pass finds
+    all of them at once, so the cost depends on the length of the text and the number of
+    matches, not on how many keywords are searched for. That pass uses the pyahocorasick
+    automaton when it is installed and a pure-Python one otherwise.
+    """
+
+    def __init__(self, keywords: List[str], whole_word: bool = False, engine: Optional[str] = None):
+        """Builds the matcher.
+
+        Args:
+            keywords (List[str]): Keywords to search for; matching ignores case, results use these spellings.
+            whole_word (bool): Only report occurrences not preceded or followed by a letter, digit or underscore.
+            engine (str): One of ENGINES; by default picked from the number of keywords.
+        """
+        self.keywords = list(dict.fromkeys(keywords))
+        self.whole_word = whole_word
+        # Every lowercased keyword and the spellings that lowercase to it
+        self.lowered = {}
+        for keyword in self.keywords:
+            if keyword.lower():
+                self.lowered[keyword.lower()] = self.lowered.get(keyword.lower(), ()) + (keyword,)
+        self.max_length = max(map(len, self.lowered), default=0)
+        if engine is None:
+            engine = ("per-keyword" if len(self.lowered) <= PER_KEYWORD_LIMIT
+                      else "ahocorasick" if ahocorasick else "python")
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        if engine == "ahocorasick" and ahocorasick is None:
+            raise ValueError("The ahocorasick engine needs the pyahocorasick package")
+        self.engine = engine
+        if engine == "per-keyword":
+            self._find = self._find_per_keyword
+        elif engine == "ahocorasick":
+            self.automaton = ahocorasick.Automaton()
+            for lowered, spellings in self.lowered.items():
+                self.automaton.add_word(lowered, (len(lowered), spellings))
+            self.automaton.make_automaton()
+            self._find = self._find_ahocorasick
+        else:
+            self._build_automaton()
+            self._find = self._find_automaton
+
+    def _build_automaton(self):
+        """Builds the pure-Python automaton: a trie of the keywords with failure links."""
+        # State 0 is the root; goto[state] maps a character to the next state
+        self.goto = [{}]
+        self.fail = [0]
+        # Keywords (original spelling) and the length of their lowercased form, ending at each state
+        self.output = [()]
+        for lowered, spellings in self.lowered.items():
+            state = 0
+            for char in lowered:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state] += tuple((keyword, len(lowered)) for keyword in spellings)
+        self._link_failures()
+        # goto plus the cached failure-resolved transitions
+        self.delta = [dict(transitions) for transitions in self.goto]
+
+    def _link_failures(self):
+        """Breadth-first, points every state at its longest proper suffix that is also a keyword prefix."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                # A state also ends every keyword its failure state ends
+                self.output[child] += self.output[self.fail[child]]
+
+    def _resolve(self, state: int, char: str) -> int:
+        """Follows failure links from `state` on `char` and caches the state reached."""
+        origin = state
+        while state and char not in self.goto[state]:
+            state = self.fail[state]
+        self.delta[origin][char] = next_state = self.goto[state].get(char, 0)
+        return next_state
+
+    def _find_per_keyword(self, window: str, base: int) -> Iterator[Tuple[int, int, str]]:
+        """Yields (start, end, keyword) for the occurrences in `window` ending after `base`, with str.find."""
+        find = window.find
+        for lowered, spellings in self.lowered.items():
+            start = find(lowered, max(0, base - len(lowered) + 1))
+            while start != -1:
+                for keyword in spellings:
+                    yield start, start + len(lowered), keyword
+                start = find(lowered, start + 1)
+
+    def _find_ahocorasick(self, window: str, base: int) -> Iterator[Tuple[int, int, str]]:
+        """Same as _find_per_keyword, with one pass of the pyahocorasick automaton."""
+        if not self.lowered:
+            return  # pyahocorasick refuses to scan with an empty automaton
+        for last, (length, spellings) in self.automaton.iter(window):
+            if last >= base:
+                for keyword in spellings:
+                    yield last - length + 1, last + 1, keyword
+
+    def _find_automaton(self, window: str, base: int) -> Iterator[Tuple[int, int, str]]:
+        """Same as _find_per_keyword, with one pass of the pure-Python automaton.
+
+        Transitions that follow failure links are resolved once and cached, which turns the
+        trie into a DFA for the characters the texts actually contain.
+        """
+        delta, output = self.delta, self.output
+        state = 0
+        for i, char in enumerate(window):
+            next_state = delta[state].get(char)
+            state = self._resolve(state, char) if next_state is None else next_state
+            if output[state] and i >= base:
+                for keyword, length in output[state]:
+                    yield i - length + 1, i + 1, keyword
+
+    def _windows(self, chunks: Iterable[str]) -> Iterator[Tuple[str, int, int]]:
+        """Yields (window, base, offset) for every lowercased chunk.
+
+        The window is the chunk after the last `max_length` characters before it, which start
+        at `base` in the window and at `offset` in the whole text. Every occurrence that ends in
+        the chunk lies inside its window, including those spanning a chunk boundary.
+        """
+        tail, tail_offset = "", 0
+        for chunk in chunks:
+            lowered = chunk.lower()
+            if not lowered:
+                continue
+            window = tail + lowered
+            yield window, len(tail), tail_offset
+            keep = min(len(window), self.max_length)
+            tail_offset += len(window) - keep
+            tail = window[len(window) - keep:]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yields (offset, keyword) for every occurrence in `text`, overlapping ones included.
+
+        Offsets are character offsets into the lowercased text, which for ASCII text are also byte offsets.
+        """
+        return self.iter_stream_matches((text,))
+
+    def iter_stream_matches(self, chunks: Iterable[str]) -> Iterator[Tuple[int, str]]:
+        """Yields the same matches as iter_matches over the concatenation of `chunks`.
+
+        Keywords that span a chunk boundary are found, and only the last `max_length`
+        characters of the previous chunk are kept around, so memory use is bounded by the
+        chunk size, not by the length of the text. Matches come in text order for each keyword.
+        """
+        find, whole_word = self._find, self.whole_word
+        # Whole-word matches that end on the last character of a chunk, waiting for the next character
+        pending = []
+        for window, base, offset in self._windows(chunks):
+            if pending:
+                if not is_word_char(window[base]):
+                    yield from pending
+                pending = []
+            for start, end, keyword in find(window, base):
+                if whole_word:
+                    if start > 0 and is_word_char(window[start - 1]):
+                        continue
+                    if end == len(window):
+                        pending.append((offset + start, keyword))
+                        continue
+                    if is_word_char(window[end]):
+                        continue
+                yield offset + start, keyword
+        # The text ended right after these matches
+        yield from pending
+
+    def _presence_per_keyword(self, chunks: Iterable[str]) -> Set[str]:
+        """The keywords found in the concatenation of `chunks`, with one `in` test per keyword and chunk."""
+        remaining = dict(self.lowered)
+        found = set()
+        for window, _, _ in self._windows(chunks):
+            for lowered in [lowered for lowered in remaining if lowered in window]:
+                found.update(remaining.pop(lowered))
+            if not remaining:
+                break
+        return found
+
+    def scan(self, text: str, report: str = "presence"):
+        """Summarises the matches in `text`.
+
+        Args:
+            text (str): Text to search.
+            report (str): "presence" returns the set of keywords found, stopping as soon as all are;
+                "counts" returns {keyword: occurrences}; "offsets" returns {keyword: [offsets]}.
+        """
+        return self.scan_stream((text,), report)
+
+    def scan_stream(self, chunks: Iterable[str], report: str = "presence"):
+        """Same as scan, over the concatenation of `chunks`; see iter_stream_matches."""
+        if report not in REPORTS:
+            raise ValueError(f"Unknown report: {report}")
+        if report == "presence" and self.engine == "per-keyword" and not self.whole_word:
+            return self._presence_per_keyword(chunks)
+        matches = self.iter_stream_matches(chunks)
+        if report == "presence":
+            found = set()
+            for _, keyword in matches:
+                found.add(keyword)
+                if len(found) == len(self.keywords):
+                    break
+            return found
+        if report == "counts":
+            counts = {}
+            for _, keyword in matches:
+                counts[keyword] = counts.get(keyword, 0) + 1
+            return counts
+        offsets = {}
+        for offset, keyword in matches:
+            offsets.setdefault(keyword, []).append(offset)
+        return offsets
+
+
+def read_chunks(file: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yields the rest of `file` `chunk_size` characters at a time."""
+    while chunk := file.read(chunk_size):
+        yield chunk
+
+
+def search_keywords_in_file(filepath: str, matcher: KeywordMatcher, report: str = "presence",
+                            chunk_size: int = CHUNK_SIZE) -> Dict[str, list]:
+    """Searches for the matcher's keywords in a single text file.
+
+    The file is decoded and scanned `chunk_size` characters at a time, so memory use does not
+    grow with the file size.
+
+    Args:
+        filepath (str): Path to the file to search in.
+        matcher (KeywordMatcher): Matcher built once for the whole search.
+        report (str): "presence", "counts" or "offsets", see KeywordMatcher.scan.
+        chunk_size (int): Characters read and scanned at a time.
+
+    Returns:
+        Dict[str, list]: Each found keyword maps to a list holding the file path for "presence",
+        (file path, count) for "counts" or (file path, [offsets]) for "offsets".
+    """
+    result = {}
+    try:
+        with open(filepath, 'r', encoding='utf-8') as file:
+            chunks = read_chunks(file, chunk_size)
+            found = matcher.scan_stream(chunks, report)
+            # A file that is not valid UTF-8 is skipped even after every keyword has been found,
+            # so decode the rest of it
+            for _ in chunks:
+                pass
+    except (OSError, UnicodeDecodeError):
+        return result
+    # Keep the order of the keyword list, as the per-keyword search did
+    if report == "presence":
+        return {keyword: [filepath] for keyword in matcher.keywords if keyword in found}
+    return {keyword: [(filepath, found[keyword])] for keyword in matcher.keywords if keyword in found}
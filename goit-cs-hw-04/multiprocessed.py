@@ -1,79 +1,121 @@
+import atexit
 import multiprocessing
-from typing import List, Dict
-from multiprocessing import Queue
+import os
+from multiprocessing.pool import Pool
+from typing import List, Dict, Optional, Tuple
 
-def search_keywords_in_file(filepath: str, keywords: List[str]) -> Dict[str, List[str]]:
-    """Searches for given keywords in a single text file.
+from keyword_matcher import KeywordMatcher, search_keywords_in_file
+
+# Largest amount of small files grouped into one task, in bytes
+BATCH_BYTES = 4 << 20
+# Tasks planned per worker when the files are small, so idle workers always have one to pull
+TASKS_PER_WORKER = 4
+
+_pool = None
+# The matcher each worker process built for the last search, keyed by its keywords and options
+_worker_matcher: Tuple[Optional[tuple], Optional[KeywordMatcher]] = (None, None)
+
+def get_pool() -> Pool:
+    """Returns the process pool shared by every search, starting one worker per CPU core on first use."""
+    global _pool
+    if _pool is None:
+        _pool = Pool(processes=multiprocessing.cpu_count())
+        atexit.register(close_pool)
+    return _pool
+
+def close_pool() -> None:
+    """Stops the shared pool's workers; the next search starts a new pool."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+
+def plan_tasks(filepaths: List[str], batch_bytes: Optional[int] = None,
+               workers: Optional[int] = None) -> List[List[str]]:
+    """Groups files into tasks, largest first.
+
+    Every file of at least `batch_bytes` is a task of its own, smaller ones are packed together
+    until a task holds about `batch_bytes`. Handing out the largest tasks first means the last
+    tasks to finish are small ones, so no worker is left with a huge file while the others idle.
 
     Args:
-        filepath (str): Path to the file to search in.
-        keywords (List[str]): List of lowercase keywords to search for.
+        filepaths (List[str]): List of paths to text files to be scanned.
+        batch_bytes (int): Target size of one task in bytes; by default the input is split into
+            TASKS_PER_WORKER tasks per worker, with tasks of at most BATCH_BYTES.
+        workers (int): Number of pool workers, the CPU count by default.
 
     Returns:
-        Dict[str, List[str]]: A dictionary where each found keyword maps to a list
-        containing the file path (once per keyword if found).
+        List[List[str]]: File paths of every task, in the order they should be handed out.
     """
-    result = {}
-    try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            content = file.read().lower()
-            for keyword in keywords:
-                if keyword.lower() in content:
-                    result.setdefault(keyword, []).append(filepath)
-    except (OSError, UnicodeDecodeError):
-        pass
-    return result
+    sizes = {}
+    for path in filepaths:
+        try:
+            sizes[path] = os.path.getsize(path)
+        except OSError:
+            sizes[path] = 0  # search_keywords_in_file skips it as before
+    if batch_bytes is None:
+        workers = workers or multiprocessing.cpu_count()
+        batch_bytes = max(1, min(BATCH_BYTES, sum(sizes.values()) // (workers * TASKS_PER_WORKER)))
+    tasks = []
+    batch, batch_size = [], 0
+    for path in sorted(filepaths, key=sizes.__getitem__, reverse=True):
+        if sizes[path] >= batch_bytes:
+            tasks.append([path])
+            continue
+        batch.append(path)
+        batch_size += sizes[path]
+        if batch_size >= batch_bytes:
+            tasks.append(batch)
+            batch, batch_size = [], 0
+    if batch:
+        tasks.append(batch)
+    return tasks
 
-def mp_worker(files: List[str], keywords: List[str], queue: Queue) -> None:
-    """Worker function to be run inside a separate process.
+def mp_worker(task: Tuple[List[str], List[str], bool, str]) -> Dict[str, list]:
+    """Worker function to be run inside a pool process.
 
-    It searches for keywords across the assigned files and sends the result
-    dictionary back to the parent process via a queue.
+    It searches for keywords across the files of one task and returns the result dictionary,
+    which the pool streams back to the parent. The keyword matcher is built on the first
+    task of a search and reused for the rest of that search's tasks.
 
     Args:
-        files (List[str]): A list of file paths to the process.
-        keywords (List[str]): List of keywords to search for in each file.
-        queue (Queue): A multiprocessing queue used to send results back to the parent.
+        task: The task's file paths, the keywords, whole_word and report, see multiprocess_search.
     """
+    global _worker_matcher
+    files, keywords, whole_word, report = task
+    key = (tuple(keywords), whole_word)
+    if _worker_matcher[0] != key:
+        _worker_matcher = (key, KeywordMatcher(keywords, whole_word))
+    matcher = _worker_matcher[1]
     result = {}
     for path in files:
-        partial = search_keywords_in_file(path, keywords)
+        partial = search_keywords_in_file(path, matcher, report)
         for word, matches in partial.items():
             result.setdefault(word, []).extend(matches)
-    queue.put(result)
+    return result
 
-def multiprocess_search(filepaths: List[str], keywords: List[str]) -> Dict[str, List[str]]:
+def multiprocess_search(filepaths: List[str], keywords: List[str], whole_word: bool = False,
+                        report: str = "presence") -> Dict[str, list]:
     """Performs a parallel keyword search across multiple files using multiprocessing.
 
-    Files are split among multiple processes based on the number of available CPU cores.
-    Each process performs the search and returns its partial result via a multiprocessing queue.
+    Files are grouped into size-aware tasks (see plan_tasks) and run on a persistent pool with
+    one process per CPU core, which later searches reuse. Idle workers pull the next task, and
+    partial results are merged as they arrive.
 
     Args:
         filepaths (List[str]): List of paths to text files to be scanned.
         keywords (List[str]): List of keywords to search for in each file.
+        whole_word (bool): Only match keywords that are whole words.
+        report (str): "presence", "counts" or "offsets", see search_keywords_in_file.
 
     Returns:
-        Dict[str, List[str]]: A dictionary where each key is a keyword, and the value is a
-        list of file paths in which that keyword was found.
+        Dict[str, list]: A dictionary where each key is a keyword, and the value is a
+        list of file paths in which that keyword was found (with counts or offsets if requested).
     """
     result = {}
-    queue = multiprocessing.Queue()
-
-    processes = []
-    cpu_count = multiprocessing.cpu_count()
-    chunk_size = len(filepaths) // cpu_count or 1
-
-    for i in range(0, len(filepaths), chunk_size):
-        p = multiprocessing.Process(target=mp_worker, args=(filepaths[i:i+chunk_size], keywords, queue))
-        p.start()
-        processes.append(p)
-
-    for _ in processes:
-        partial = queue.get()
+    tasks = [(files, keywords, whole_word, report) for files in plan_tasks(filepaths)]
+    for partial in get_pool().imap_unordered(mp_worker, tasks):
         for word, matches in partial.items():
             result.setdefault(word, []).extend(matches)
-
-    for p in processes:
-        p.join()
-
     return result
@@ -1,44 +1,28 @@
 import threading
 from typing import List, Dict
 
-def search_keywords_in_file(filepath: str, keywords: List[str]) -> Dict[str, List[str]]:
-    """Searches for given keywords in a single text file.
+from keyword_matcher import KeywordMatcher, search_keywords_in_file
 
-    Args:
-        filepath (str): Path to the file to search in.
-        keywords (List[str]): List of lowercase keywords to search for.
-
-    Returns:
-        Dict[str, List[str]]: A dictionary where each found keyword maps to a list
-        containing the file path (once per keyword if found).
-    """
-    result = {}
-    try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            content = file.read().lower()
-            for keyword in keywords:
-                if keyword.lower() in content:
-                    result.setdefault(keyword, []).append(filepath)
-    except (OSError, UnicodeDecodeError):
-        pass
-    return result
-
-def threaded_search(filepaths: List[str], keywords: List[str]) -> Dict[str, List[str]]:
+def threaded_search(filepaths: List[str], keywords: List[str], whole_word: bool = False,
+                    report: str = "presence") -> Dict[str, list]:
     """Performs a parallel keyword search across multiple files using threads.
 
     Each thread processes a subset of files and aggregates results into a shared dictionary
-    with thread-safe access.
+    with thread-safe access. One keyword matcher is built up front and shared by all threads.
 
     Args:
         filepaths (List[str]): List of paths to text files to be scanned.
         keywords (List[str]): List of keywords to search for in each file.
+        whole_word (bool): Only match keywords that are whole words.
+        report (str): "presence", "counts" or "offsets", see search_keywords_in_file.
 
     Returns:
-        Dict[str, List[str]]: A dictionary where each key is a keyword, and the value is a
-        list of file paths in which that keyword was found.
+        Dict[str, list]: A dictionary where each key is a keyword, and the value is a
+        list of file paths in which that keyword was found (with counts or offsets if requested).
     """
     result = {}
     lock = threading.Lock()
+    matcher = KeywordMatcher(keywords, whole_word)
 
     def worker(files: List[str]):
         """Worker function for a single thread to process a chunk of files.
@@ -48,7 +32,7 @@ def threaded_search(filepaths: List[str], keywords: List[str]) -> Dict[str, List
         """
         local_result = {}
         for path in files:
-            partial = search_keywords_in_file(path, keywords)
+            partial = search_keywords_in_file(path, matcher, report)
             for word, matches in partial.items():
                 local_result.setdefault(word, []).extend(matches)
         with lock: